@@ -1,5 +1,11 @@
 from fastapi import FastAPI, Response
-app = FastAPI()
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.responses import FastJSONResponse
+from shared.metrics import install_metrics
+app = FastAPI(default_response_class=FastJSONResponse)
+install_metrics(app)
 
 @app.get("/show_hello")
 def show_hello(response: Response):
@@ -1,6 +1,11 @@
 from fastapi import FastAPI,HTTPException
-from fastapi.responses import JSONResponse
-app = FastAPI()
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.responses import FastJSONResponse
+from shared.metrics import install_metrics
+app = FastAPI(default_response_class=FastJSONResponse)
+install_metrics(app)
 
 @app.get("/student_info")
 def student_info():
@@ -16,7 +21,7 @@ def student_info():
         "course":"B.Tech",
         "branch":"Mechanical"
     }]
-    return JSONResponse(content=data, status_code=200)
+    return FastJSONResponse(content=data, status_code=200)
 
 
 @app.get("/student_info/{student_id}")
@@ -37,7 +42,7 @@ def student_info(student_id: int):
     }]
     for student in data:
         if student["id"] == student_id:
-            return JSONResponse(content=student, status_code=200)
+            return FastJSONResponse(content=student, status_code=200)
     
     raise HTTPException(status_code=404, detail="Student not found")
 
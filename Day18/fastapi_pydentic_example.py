@@ -1,5 +1,9 @@
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.responses import FastJSONResponse
+from shared.metrics import install_metrics
 from fastapi.exceptions import HTTPException
 from pydantic import BaseModel
 
@@ -12,8 +16,9 @@ class Student(BaseModel):
 
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
+install_metrics(app)
 
 @app.post("/add_student")
 def add_student(student: Student):
-   return JSONResponse(content={"message":"Student added successfully"}, status_code=201)
\ No newline at end of file
+   return FastJSONResponse(content={"message":"Student added successfully"}, status_code=201)
\ No newline at end of file
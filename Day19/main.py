@@ -1,20 +1,24 @@
-from fastapi import FastAPI,HTTPException
+from fastapi import FastAPI,HTTPException,Request
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
-import json
+from fastapi.responses import Response
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.responses import FastJSONResponse
+from shared.metrics import install_metrics, timed
+from shared.etag import etag_matches
+from product_store import ProductStore
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
+install_metrics(app)
 
 File_Name="product.json"
+store=ProductStore(File_Name)
 
 def read_product():
-    with open(File_Name,'r') as f:
-        return json.load(f)
-    
-def write_product(data):
-    with open(File_Name,'w') as f:
-        json.dump(data,f,indent=4)    
+    with timed("storage"):
+        return store.refresh()
 
 class Product(BaseModel):
     product_name: str
@@ -30,22 +34,22 @@ def get_root():
     return {"message":"Welcome to Product Management API"}
 
 @app.get("/products")
-def get_all_products():
+def get_all_products(request: Request):
     products=read_product()
     if not products:
         raise HTTPException(status_code=404,detail="No products found")
-    return JSONResponse(content=products,status_code=200)
+    etag, body=store.encoded()
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304,headers={"ETag":etag})
+    return FastJSONResponse(content=body,status_code=200,headers={"ETag":etag})
 
 @app.get("/products/{product_name}")
 def get_product_by_name(product_name: str):
-    products=read_product()
-    product_list=[]
-    for product in products:
-        if product["product_name"]==product_name:
-            product_list.append(product)
+    read_product()
+    product_list=store.find(product_name)
     
     if product_list:
-        return JSONResponse(content=product_list,status_code=200)
+        return FastJSONResponse(content=product_list,status_code=200)
     
     raise HTTPException(status_code=404,detail="Product not found")
 
@@ -53,35 +57,39 @@ def get_product_by_name(product_name: str):
 # Post a product
 @app.post("/product")
 def add_product(product:Product):
-    products=read_product()
-    for p in products:
-        if p["product_name"]==product.product_name and p["product_model"]==product.product_model:
-            raise HTTPException(status_code=400,detail="Product already exists")
-    products.append(product.dict())
-    write_product(products)
-    return JSONResponse(content={"message":"Product added successfully"},status_code=201)
+    read_product()
+    try:
+        with timed("storage"):
+            store.add(product.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400,detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=503,detail=str(e))
+    return FastJSONResponse(content={"message":"Product added successfully"},status_code=201)
 
 @app.delete("/product/{product_name}/{product_model}")
 def delete_product(product_name:str, product_model:str):
-    products=read_product()
-    for product in products:
-        if product["product_name"]==product_name and product["product_model"]==product_model:
-            products.remove(product)
-            write_product(products)
-            return JSONResponse(content={"message":"Product deleted successfully"},status_code=200)
+    read_product()
+    try:
+        with timed("storage"):
+            deleted=store.delete(product_name, product_model)
+    except TimeoutError as e:
+        raise HTTPException(status_code=503,detail=str(e))
+    if deleted:
+        return FastJSONResponse(content={"message":"Product deleted successfully"},status_code=200)
         
     raise HTTPException(status_code=404,detail="Product not found")
 
 @app.patch("/product/{product_name}/{product_model}/quantity/{quantity}")
 def update_product_quantity(product_name:str, product_model:str, quantity:int):
-    products=read_product()
-    for product in products:
-        if product["product_name"]==product_name and product["product_model"]==product_model:
-            exist_quantity = product["product_quantity"]
-            if quantity > exist_quantity:
-                raise HTTPException(status_code=400,detail="Insufficient product quantity")
-            product["product_quantity"]=exist_quantity - quantity
-            write_product(products)
-            return JSONResponse(content={"message":"Product quantity updated successfully"},status_code=200)
-        
-    raise HTTPException(status_code=404,detail="Product not found")
+    read_product()
+    try:
+        with timed("storage"):
+            store.decrement_quantity(product_name, product_model, quantity)
+    except KeyError:
+        raise HTTPException(status_code=404,detail="Product not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400,detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=503,detail=str(e))
+    return FastJSONResponse(content={"message":"Product quantity updated successfully"},status_code=200)
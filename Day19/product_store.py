@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import threading
+import time
+from shared.etag import EncodedCache
+
+# how long the flusher waits for more changes before writing, so a burst of
+# orders shares one file write
+FLUSH_WINDOW = 0.005
+# longest pause between attempts while product.json can't be written
+MAX_RETRY_DELAY = 1.0
+# how long a request waits for its change to reach disk before giving up
+FLUSH_TIMEOUT = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+class ProductStore:
+    # keeps product.json in memory, reloads it when the file changes and
+    # bumps version on every change so the encoded list can be reused.
+    # products are indexed by (product_name, product_model) and by name;
+    # dicts keep insertion order, so the file order survives deletes.
+    #
+    # changes are made in memory under a per-product lock, so orders for
+    # different products never wait on each other. a background thread
+    # writes the whole catalog once per burst of changes, and each caller
+    # returns only after the write that includes its change.
+    def __init__(self, file_name="product.json"):
+        self.file_name = file_name
+        self.by_key = {}
+        self.by_name = {}
+        self.version = 0
+        self._stat = None
+        self._encoded = EncodedCache()
+        # guards the shape of the indexes: reloads, adds, deletes and the flusher's copy
+        self._lock = threading.Lock()
+        self._sku_locks = {}
+        # guards version and the change/flush counters
+        self._changed = threading.Condition()
+        self._changes = 0
+        self._flushed = 0
+        self._flusher = None
+
+    def _file_stat(self):
+        st = os.stat(self.file_name)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _build_indexes(self, products):
+        by_key = {}
+        by_name = {}
+        for product in products:
+            key = (product["product_name"], product["product_model"])
+            by_key[key] = product
+            by_name.setdefault(key[0], {})[key[1]] = product
+        self.by_key = by_key
+        self.by_name = by_name
+        self._sku_locks = {key: lock for key, lock in self._sku_locks.items() if key in by_key}
+
+    @property
+    def products(self):
+        return list(self.by_key.values())
+
+    def refresh(self):
+        if self._stat is None or self._file_stat() != self._stat:
+            with self._lock:
+                stat = self._file_stat()
+                # changes not yet on disk are newer than the file, so keep them
+                if stat != self._stat and self._flushed == self._changes:
+                    with open(self.file_name, 'r') as f:
+                        self._build_indexes(json.load(f))
+                    with self._changed:
+                        self.version += 1
+                    self._stat = stat
+        return self.by_key
+
+    def _sku_lock(self, key):
+        # the product's lock, or None when there is no such product. locks
+        # only exist for products in the catalog and go when they are deleted
+        lock = self._sku_locks.get(key)
+        if lock is None:
+            with self._lock:
+                if key not in self.by_key:
+                    return None
+                lock = self._sku_locks.setdefault(key, threading.Lock())
+        return lock
+
+    def _record_change(self):
+        # called after the in-memory change is made; the returned ticket is
+        # covered by the first flush that starts after this point
+        with self._changed:
+            self._changes += 1
+            self.version += 1
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="product-flusher", daemon=True)
+                self._flusher.start()
+            self._changed.notify_all()
+            return self._changes
+
+    def _wait_flushed(self, ticket):
+        # a failed write is retried rather than reported straight away: the
+        # change stays in memory and goes out with the next write. only after
+        # FLUSH_TIMEOUT does the caller get TimeoutError, with the change
+        # still applied and queued for the flusher
+        deadline = time.monotonic() + FLUSH_TIMEOUT
+        with self._changed:
+            while self._flushed < ticket:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Change not yet written to {self.file_name}")
+                self._changed.wait(remaining)
+
+    def _flush_loop(self):
+        retry_delay = FLUSH_WINDOW
+        while True:
+            with self._changed:
+                while self._flushed == self._changes:
+                    self._changed.wait()
+            time.sleep(FLUSH_WINDOW)
+            with self._changed:
+                target = self._changes
+            try:
+                self._write(target)
+            except OSError as e:
+                logger.warning("Writing %s failed, retrying in %.2fs: %s", self.file_name, retry_delay, e)
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+                continue
+            retry_delay = FLUSH_WINDOW
+            with self._changed:
+                self._flushed = target
+                self._changed.notify_all()
+
+    def _write(self, target):
+        # everything up to ticket target is already in memory, so it is in this copy.
+        # written compact in one call: with indent, json falls back to its
+        # pure-Python encoder, seconds at 100k+ products
+        with self._lock:
+            products = self.products
+        data = json.dumps(products)
+        tmp_name = f"{self.file_name}.tmp"
+        with open(tmp_name, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            os.replace(tmp_name, self.file_name)
+            self._stat = self._file_stat()
+
+    def find(self, product_name):
+        return list(self.by_name.get(product_name, {}).values())
+
+    def get(self, product_name, product_model):
+        return self.by_key.get((product_name, product_model))
+
+    def add(self, product):
+        key = (product["product_name"], product["product_model"])
+        with self._lock:
+            if key in self.by_key:
+                raise ValueError("Product already exists")
+            self.by_key[key] = product
+            self.by_name.setdefault(key[0], {})[key[1]] = product
+            ticket = self._record_change()
+        self._wait_flushed(ticket)
+
+    def delete(self, product_name, product_model):
+        # False when there is no such product
+        key = (product_name, product_model)
+        while True:
+            lock = self._sku_lock(key)
+            if lock is None:
+                return False
+            with lock, self._lock:
+                if self._sku_locks.get(key) is not lock:
+                    # deleted, and maybe added again, while we waited
+                    continue
+                del self.by_key[key]
+                del self._sku_locks[key]
+                models = self.by_name[product_name]
+                del models[product_model]
+                if not models:
+                    del self.by_name[product_name]
+                ticket = self._record_change()
+            self._wait_flushed(ticket)
+            return True
+
+    def decrement_quantity(self, product_name, product_model, quantity):
+        # atomic check-and-decrement. KeyError when there is no such product,
+        # ValueError when stock is short
+        key = (product_name, product_model)
+        while True:
+            lock = self._sku_lock(key)
+            if lock is None:
+                raise KeyError(key)
+            with lock:
+                if self._sku_locks.get(key) is not lock:
+                    # deleted, and maybe added again, while we waited
+                    continue
+                product = self.by_key[key]
+                if quantity > product["product_quantity"]:
+                    raise ValueError("Insufficient product quantity")
+                product["product_quantity"] -= quantity
+                ticket = self._record_change()
+            self._wait_flushed(ticket)
+            return
+
+    def encoded(self):
+        # (etag, body) for the full list, rebuilt only after a change
+        return self._encoded.get(self.version, lambda: self.products)
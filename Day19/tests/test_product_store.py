@@ -0,0 +1,81 @@
+import json
+import os
+import sys
+import threading
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# the repo root, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import product_store
+from product_store import ProductStore
+
+PRODUCTS = 10
+STOCK = 100
+THREADS = 40
+ORDERS = 20
+
+
+def product(i):
+    return {"product_name": f"Product{i}", "product_model": "M1",
+            "product_price": 10, "product_quantity": STOCK}
+
+
+def open_store(path):
+    path.write_text(json.dumps([product(i) for i in range(PRODUCTS)]))
+    store = ProductStore(str(path))
+    store.refresh()
+    return store
+
+
+def test_concurrent_orders_never_oversell(tmp_path):
+    store = open_store(tmp_path / "product.json")
+    sold = [0] * PRODUCTS
+    sold_lock = threading.Lock()
+
+    def order(thread):
+        for n in range(ORDERS):
+            i = (thread + n) % PRODUCTS
+            try:
+                store.decrement_quantity(f"Product{i}", "M1", 3)
+            except ValueError:
+                continue
+            with sold_lock:
+                sold[i] += 3
+
+    threads = [threading.Thread(target=order, args=(t,)) for t in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # each product has stock for 33 orders of 3 and gets 80 attempts
+    assert sold == [STOCK // 3 * 3] * PRODUCTS
+    with open(tmp_path / "product.json") as f:
+        on_disk = {p["product_name"]: p["product_quantity"] for p in json.load(f)}
+    assert on_disk == {f"Product{i}": STOCK - sold[i] for i in range(PRODUCTS)}
+
+
+def test_change_stays_queued_after_flush_timeout(tmp_path, monkeypatch):
+    store = open_store(tmp_path / "product.json")
+    monkeypatch.setattr(product_store, "FLUSH_TIMEOUT", 0.2)
+    write = store._write
+    failing = threading.Event()
+    failing.set()
+
+    def flaky_write(target):
+        if failing.is_set():
+            raise OSError("disk full")
+        write(target)
+
+    monkeypatch.setattr(store, "_write", flaky_write)
+    with pytest.raises(TimeoutError):
+        store.decrement_quantity("Product0", "M1", 5)
+    assert store.get("Product0", "M1")["product_quantity"] == STOCK - 5
+
+    # once the disk recovers, the next change waits for a write that has both
+    failing.clear()
+    store.decrement_quantity("Product1", "M1", 1)
+    with open(tmp_path / "product.json") as f:
+        on_disk = {p["product_name"]: p["product_quantity"] for p in json.load(f)}
+    assert on_disk["Product0"] == STOCK - 5
+    assert on_disk["Product1"] == STOCK - 1
@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.load_test import run_load
+from shared.local_server import free_port, wait_for_port
+
+# generates synthetic students.json files, starts main.py under uvicorn for
+# each size and drives every route, writing RPS and latency percentiles as JSON.
+# example:
+#   python benchmark_api.py --sizes 10000,100000,1000000 -c 64 -n 2000 -o results.json
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+API_KEY = "benchmark-key"
+BULK_SIZE = 100
+
+
+def generate_students(file_name, count, seed=42):
+    rng = random.Random(seed)
+    students = [
+        {
+            "student_id": i,
+            "student_name": f"Student{i}",
+            "student_age": rng.randint(17, 25),
+            "student_marks": rng.randint(0, 100),
+        }
+        for i in range(1, count + 1)
+    ]
+    with open(file_name, 'w') as f:
+        f.write(json.dumps(students))
+
+
+def start_server(work_dir, port, backend, workers=1):
+    env = dict(os.environ,
+               STUDENT_DB_BACKEND=backend,
+               STUDENT_DB_FILE=os.path.join(work_dir, "students.json"),
+               STUDENT_DB_SQLITE_FILE=os.path.join(work_dir, "students.db"),
+               STUDENT_DB_MMAP_FILE=os.path.join(work_dir, "students.bin"),
+               API_KEYS_FILE=os.path.join(work_dir, "api_keys.json"))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", APP_DIR,
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=work_dir, env=env)
+
+
+def write_api_keys(work_dir):
+    with open(os.path.join(work_dir, "api_keys.json"), 'w') as f:
+        # a bucket large enough that rate limiting never skews the numbers
+        json.dump([{"client": "benchmark", "key_hash": hashlib.sha256(API_KEY.encode()).hexdigest(),
+                    "rate": 1e9, "burst": 1e9}], f)
+
+
+def endpoints(size):
+    # (name, method, path, request share, body factory).
+    # GET /students/changes is left out: it is a long-lived stream with no
+    # per-request latency to measure.
+    def new_student(i):
+        student_id = size + i
+        return json.dumps({"student_id": student_id, "student_name": f"New{student_id}",
+                           "student_age": 20, "student_marks": 75}).encode()
+
+    bulk_start = size * 10
+
+    def new_bulk(i):
+        first = bulk_start + (i - 1) * BULK_SIZE
+        return "".join(json.dumps({"student_id": first + j, "student_name": f"Bulk{first + j}",
+                                   "student_age": 21, "student_marks": 60}) + "\n"
+                       for j in range(BULK_SIZE)).encode()
+
+    return [
+        ("GET /students", "GET", "/students", 0.1, None),
+        ("GET /students?limit=100", "GET", "/students?limit=100&cursor=%d" % (size // 2), 1.0, None),
+        ("GET /students?format=ndjson&limit=1000", "GET", "/students?format=ndjson&limit=1000", 0.5, None),
+        ("GET /students/marks", "GET", "/students/marks?marks=95&age=24", 0.5, None),
+        ("GET /students/stats", "GET", "/students/stats", 0.5, None),
+        ("GET /students/{id}", "GET", "/students/%d" % (size // 3 or 1), 1.0, None),
+        ("POST /students", "POST", "/students", 1.0, new_student),
+        ("POST /students/bulk", "POST", "/students/bulk", 0.1, new_bulk),
+        ("GET /metrics", "GET", "/metrics", 0.5, None),
+    ]
+
+
+async def run_size(size, args):
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        generate_students(os.path.join(work_dir, "students.json"), size)
+        write_api_keys(work_dir)
+
+        port = free_port()
+        start = time.perf_counter()
+        process = start_server(work_dir, port, args.backend)
+        try:
+            wait_for_port(port, process)
+            results["startup_seconds"] = round(time.perf_counter() - start, 3)
+            for name, method, path, share, make_body in endpoints(size):
+                total = max(args.concurrency, int(args.requests * share))
+                results[name] = await run_load(f"http://127.0.0.1:{port}{path}", method,
+                                               {"x-api-key": API_KEY}, None, args.concurrency,
+                                               total, make_body)
+                print(f"  {size} {name}: {results[name]['rps']} rps, p99 {results[name]['p99_ms']}ms")
+        finally:
+            process.terminate()
+            process.wait()
+    return results
+
+
+async def main(args):
+    report = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "sizes": {},
+    }
+    for size in args.sizes:
+        print(f"Benchmarking {size} students on the {args.backend} backend")
+        report["sizes"][str(size)] = await run_size(size, args)
+
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"Wrote {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every Day20 route on synthetic datasets")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        type=lambda value: [int(v) for v in value.split(",")])
+    parser.add_argument("--backend", default="json", choices=["json", "sqlite", "mmap"])
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("-n", "--requests", type=int, default=2000,
+                        help="requests per endpoint, scaled down for the heavy list endpoints")
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,34 @@
+import time
+from validate_token import check_token
+
+# per-request cost of the API key check: hashed lookup plus token bucket
+ROUNDS = 1_000_000
+KEY = "mysecretkey"
+
+check_token.load_api_keys()
+bucket = check_token.lookup_client(KEY).bucket
+# a bucket that never runs dry, so every call measures the allowed path
+bucket.rate = bucket.capacity = bucket.tokens = 1e12
+
+
+def old_check(x_api_key):
+    return x_api_key != "mysecretkey"
+
+
+def new_check(x_api_key):
+    return check_token.lookup_client(x_api_key).bucket.take()
+
+
+def per_call_ns(func, arg):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(arg)
+    return (time.perf_counter() - start) / ROUNDS * 1e9
+
+
+baseline = per_call_ns(old_check, KEY)
+lookup = per_call_ns(check_token.lookup_client, KEY)
+full = per_call_ns(new_check, KEY)
+print(f"plain string compare: {baseline:.0f}ns per request")
+print(f"hashed key lookup:    {lookup:.0f}ns per request")
+print(f"lookup + bucket take: {full:.0f}ns per request ({full - baseline:.0f}ns added)")
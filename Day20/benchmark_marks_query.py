@@ -0,0 +1,50 @@
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.database import StudentStore
+
+# compares the old full scan of /students/marks with the sorted-index lookup
+TOTAL_STUDENTS = 1_000_000
+QUERIES = [(100, 25), (99, 20), (90, 24), (30, 25), (50, 18)]
+
+random.seed(42)
+students = [
+    {
+        "student_id": i,
+        "student_name": f"Student{i}",
+        "student_age": random.randint(17, 25),
+        "student_marks": random.randint(0, 100),
+    }
+    for i in range(1, TOTAL_STUDENTS + 1)
+]
+
+store = StudentStore()
+store.students = students
+start = time.perf_counter()
+store.build_indexes()
+print(f"Building indexes for {TOTAL_STUDENTS} students took {time.perf_counter() - start:.3f}s")
+
+
+def linear_scan(marks, age):
+    student_list = []
+    for student in students:
+        if student['student_marks'] >= marks and student['student_age'] >= age:
+            student_list.append(student)
+    return student_list
+
+
+for marks, age in QUERIES:
+    start = time.perf_counter()
+    scanned = linear_scan(marks, age)
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = store.filter_by_marks_and_age(marks, age)
+    index_time = time.perf_counter() - start
+
+    assert scanned == indexed
+    print(f"marks>={marks} age>={age}: {len(indexed)} rows, "
+          f"scan {scan_time * 1000:.1f}ms, index {index_time * 1000:.1f}ms, "
+          f"speedup {scan_time / index_time:.1f}x")
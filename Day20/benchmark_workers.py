@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmark_api import API_KEY, generate_students, start_server, write_api_keys
+from shared.load_test import run_load
+from shared.local_server import free_port, wait_for_port
+
+# memory per uvicorn worker for each backend as the worker count grows.
+# PSS splits shared pages (the mapped students.bin) between the processes
+# that map them, so it shows what each worker really adds. Linux only.
+# example:
+#   python benchmark_workers.py --students 1000000 --workers 1,2,4,8
+
+
+def memory_kb(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1].lower()] = int(parts[1])
+    return values
+
+
+def worker_pids(server_pid, workers):
+    # uvicorn serves from its own process with one worker; with more it spawns
+    # them through multiprocessing, next to a resource_tracker child that
+    # serves nothing, so only children started by spawn_main count
+    if workers == 1:
+        return [server_pid]
+    pids = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) != server_pid:
+                        continue
+                with open(f"/proc/{entry}/cmdline", "rb") as f:
+                    if b"spawn_main" in f.read():
+                        pids.append(int(entry))
+            except (FileNotFoundError, ProcessLookupError):
+                pass
+    return pids
+
+
+async def measure(work_dir, backend, workers, requests):
+    port = free_port()
+    process = start_server(work_dir, port, backend, workers)
+    try:
+        wait_for_port(port, process)
+        # enough requests that every worker has started and served reads
+        await run_load(f"http://127.0.0.1:{port}/students/1", headers={"x-api-key": API_KEY},
+                       concurrency=workers * 8, total=requests)
+        time.sleep(1)
+        per_worker = [memory_kb(pid) for pid in worker_pids(process.pid, workers)]
+    finally:
+        process.terminate()
+        process.wait()
+    return {
+        "workers": len(per_worker),
+        "rss_mb_per_worker": round(sum(m["rss"] for m in per_worker) / len(per_worker) / 1024, 1),
+        "pss_mb_per_worker": round(sum(m["pss"] for m in per_worker) / len(per_worker) / 1024, 1),
+        "pss_mb_total": round(sum(m["pss"] for m in per_worker) / 1024, 1),
+    }
+
+
+async def main(args):
+    report = {"students": args.students, "results": {}}
+    with tempfile.TemporaryDirectory() as work_dir:
+        generate_students(os.path.join(work_dir, "students.json"), args.students)
+        write_api_keys(work_dir)
+        for backend in args.backends:
+            report["results"][backend] = []
+            for workers in args.workers:
+                result = await measure(work_dir, backend, workers, args.requests)
+                report["results"][backend].append(result)
+                print(f"{backend} x{workers}: {result}")
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-worker memory of the Day20 backends")
+    parser.add_argument("--students", type=int, default=1_000_000)
+    parser.add_argument("--workers", default="1,2,4", type=lambda v: [int(x) for x in v.split(",")])
+    parser.add_argument("--backends", default="json,mmap", type=lambda v: v.split(","))
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-o", "--output")
+    asyncio.run(main(parser.parse_args()))
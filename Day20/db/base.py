@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from shared.etag import EncodedCache
+from .columns import compute_stats
+
+# disk and database calls made from async handlers run here, never on the event loop
+io_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("STUDENT_DB_IO_WORKERS", "8")),
+                                 thread_name_prefix="student-io")
+
+
+async def run_io(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, func, *args)
+
+
+class StudentStorage(ABC):
+    # the operations main.py needs from any student backend.
+    # version goes up on every change so cached responses know when to rebuild.
+    # columns is a StudentColumns mirror kept in step with every insert.
+    version = 0
+    columns = None
+    _encoded = None
+
+    @abstractmethod
+    def refresh(self):
+        pass
+
+    @abstractmethod
+    def all(self):
+        pass
+
+    @abstractmethod
+    def count(self):
+        pass
+
+    @abstractmethod
+    def get(self, student_id):
+        pass
+
+    @abstractmethod
+    def add(self, student):
+        pass
+
+    @abstractmethod
+    def add_many(self, students):
+        pass
+
+    @abstractmethod
+    def page(self, cursor=None, limit=100):
+        pass
+
+    @abstractmethod
+    def filter_by_marks_and_age(self, marks, age):
+        pass
+
+    def existing_ids(self, student_ids):
+        return {i for i in student_ids if self.get(i) is not None}
+
+    def stats(self, bins=10):
+        return compute_stats(self.columns, bins)
+
+    def encoded_all(self):
+        # (etag, body) for the full list, encoded once per version
+        if self._encoded is None:
+            self._encoded = EncodedCache()
+        return self._encoded.get(self.version, self.all)
+
+    # async variants for async handlers; backends that serve from memory
+    # override the read methods to skip the executor hop
+    async def arefresh(self):
+        await run_io(self.refresh)
+
+    async def acount(self):
+        return await run_io(self.count)
+
+    async def aget(self, student_id):
+        return await run_io(self.get, student_id)
+
+    async def aadd(self, student):
+        await run_io(self.add, student)
+
+    async def aadd_many(self, students):
+        await run_io(self.add_many, students)
+
+    async def aexisting_ids(self, student_ids):
+        return await run_io(self.existing_ids, student_ids)
+
+    async def aetag(self):
+        return (await self.aencoded_all())[0]
+
+    async def awarm(self):
+        # called once at startup so the first GET /students doesn't pay for
+        # encoding the full list; backends that keep no cached body skip it
+        await self.aencoded_all()
+
+    async def aencoded_all(self):
+        found = self._encoded and self._encoded.peek(self.version)
+        if found:
+            return found
+        return await run_io(self.encoded_all)
+
+    async def astats(self, bins=10):
+        return await run_io(self.stats, bins)
+
+    async def apage(self, cursor=None, limit=100):
+        return await run_io(self.page, cursor, limit)
+
+    async def afilter_by_marks_and_age(self, marks, age):
+        return await run_io(self.filter_by_marks_and_age, marks, age)
+
+    def iter_ndjson(self, cursor=None, limit=None, chunk_size=1000):
+        # serializes a chunk at a time so only one chunk is held in memory
+        sent = 0
+        while limit is None or sent < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - sent)
+            students, cursor = self.page(cursor, size)
+            if students:
+                yield "".join(json.dumps(s) + "\n" for s in students)
+                sent += len(students)
+            if cursor is None:
+                break
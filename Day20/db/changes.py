@@ -0,0 +1,117 @@
+import asyncio
+import json
+from collections import deque
+
+# how many recent inserts are kept for clients resuming from a sequence number
+HISTORY_ROWS = 10000
+# batches a subscriber may fall behind before it is dropped
+QUEUE_BATCHES = 256
+# idle streams send a keep-alive this often so proxies don't close them
+KEEPALIVE_SECONDS = 15
+CHUNK_ROWS = 1000
+
+
+class ChangeFeed:
+    # in-process broadcast of committed inserts. every insert gets the next
+    # sequence number; events travel as (first_seq, students) batches so one
+    # bulk insert is one queue item per subscriber. lives on the event loop,
+    # so publish and subscribe need no locks.
+    def __init__(self, history_rows=HISTORY_ROWS):
+        self.seq = 0
+        self.history = deque()
+        self.history_rows = history_rows
+        self._history_size = 0
+        self.subscribers = set()
+
+    def publish(self, students):
+        if not students:
+            return
+        batch = (self.seq + 1, students)
+        self.seq += len(students)
+        self.history.append(batch)
+        self._history_size += len(students)
+        while self._history_size - len(self.history[0][1]) >= self.history_rows:
+            self._history_size -= len(self.history.popleft()[1])
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.put_nowait(batch)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber):
+        # a slow consumer loses its queue; its stream ends with the last
+        # sequence number it was sent so the client can resume from there
+        self.subscribers.discard(subscriber)
+        while not subscriber.empty():
+            subscriber.get_nowait()
+        subscriber.put_nowait(None)
+
+    def since(self, seq):
+        # batches after seq, or None when seq can't be replayed: older than the
+        # history, or ahead of this feed, e.g. from before a restart
+        if seq == self.seq:
+            return []
+        if seq > self.seq:
+            return None
+        if not self.history or self.history[0][0] > seq + 1:
+            return None
+        batches = []
+        for first_seq, students in self.history:
+            last_seq = first_seq + len(students) - 1
+            if last_seq > seq:
+                skip = max(0, seq + 1 - first_seq)
+                batches.append((first_seq + skip, students[skip:]))
+        return batches
+
+    async def stream(self, since=None, format="sse"):
+        # yields encoded events: a replay from since, then live inserts
+        encode = encode_sse if format == "sse" else encode_ndjson
+        subscriber = asyncio.Queue(maxsize=QUEUE_BATCHES)
+        self.subscribers.add(subscriber)
+        # the replay covers everything up to seq at subscribe time and the
+        # queue everything after it, so nothing is sent twice or missed
+        sent = self.seq
+        backlog = [] if since is None else self.since(since)
+        try:
+            if backlog is None:
+                # too far behind to replay, the client has to refetch /students
+                yield encode("reset", sent, {"seq": sent})
+                backlog = []
+            for batch in backlog:
+                for chunk in encode_batch(encode, batch):
+                    yield chunk
+                    await asyncio.sleep(0)
+            while True:
+                try:
+                    batch = await asyncio.wait_for(subscriber.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n" if format == "sse" else "\n"
+                    continue
+                if batch is None:
+                    yield encode("dropped", sent, {"seq": sent})
+                    return
+                first_seq, students = batch
+                if first_seq + len(students) - 1 <= sent:
+                    continue
+                for chunk in encode_batch(encode, batch):
+                    yield chunk
+                    await asyncio.sleep(0)
+                sent = first_seq + len(students) - 1
+        finally:
+            self.subscribers.discard(subscriber)
+
+
+def encode_sse(event, seq, data):
+    return f"id: {seq}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def encode_ndjson(event, seq, data):
+    return json.dumps({"event": event, "seq": seq, "data": data}) + "\n"
+
+
+def encode_batch(encode, batch):
+    # large bulk inserts go out a chunk at a time so the loop stays responsive
+    first_seq, students = batch
+    for start in range(0, len(students), CHUNK_ROWS):
+        yield "".join(encode("student", first_seq + i, student)
+                      for i, student in enumerate(students[start:start + CHUNK_ROWS], start))
@@ -0,0 +1,183 @@
+import numpy as np
+
+PERCENTILES = [5, 25, 50, 75, 90, 95, 99]
+FIELDS = ("student_id", "student_age", "student_marks")
+
+
+def column_arrays(students):
+    # (ids, ages, marks) as int64 arrays. stores call this before writing a
+    # batch, so a value the mirror can't hold fails the insert, not the reload
+    try:
+        return tuple(np.array([s[field] for s in students], dtype=np.int64) for field in FIELDS)
+    except OverflowError:
+        raise ValueError("student_id, student_age and student_marks must fit in 64 bits")
+
+
+class StudentColumns:
+    # numpy mirror of the numeric student fields. arrays grow by doubling and
+    # rows are only ever appended, so readers can keep using a view while the
+    # writer appends behind it.
+    def __init__(self, capacity=1024):
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.ages = np.empty(capacity, dtype=np.int64)
+        self.marks = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+
+    @classmethod
+    def from_students(cls, students):
+        columns = cls(max(1024, len(students)))
+        columns.extend(students)
+        return columns
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("ids", "ages", "marks"):
+            grown = np.empty(capacity, dtype=np.int64)
+            grown[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, grown)
+
+    def extend(self, students):
+        self.extend_arrays(column_arrays(students))
+
+    def extend_arrays(self, arrays):
+        ids, ages, marks = arrays
+        count = len(ids)
+        self._reserve(count)
+        end = self.size + count
+        self.ids[self.size:end] = ids
+        self.ages[self.size:end] = ages
+        self.marks[self.size:end] = marks
+        self.size = end
+
+    def view(self):
+        size = self.size
+        return self.ids[:size], self.ages[:size], self.marks[:size]
+
+
+# counting wins while the (age, marks) grid is no bigger than the table itself
+MIN_COUNT_CELLS = 65536
+
+
+def percentiles_from_counts(counts, offset, percentiles):
+    # same linear interpolation as np.percentile, read off a table of value counts
+    cumulative = np.cumsum(counts)
+    ranks = np.asarray(percentiles, dtype=float) / 100 * (cumulative[-1] - 1)
+    lower = np.floor(ranks)
+    lower_values = np.searchsorted(cumulative, lower, side="right") + offset
+    upper_values = np.searchsorted(cumulative, np.ceil(ranks), side="right") + offset
+    return lower_values + (upper_values - lower_values) * (ranks - lower)
+
+
+def describe_counts(counts, offset):
+    values = np.arange(offset, offset + len(counts))
+    total = counts.sum()
+    mean = (counts * values).sum() / total
+    present = np.flatnonzero(counts)
+    percentiles = percentiles_from_counts(counts, offset, PERCENTILES + [50])
+    return {
+        "mean": round(float(mean), 3),
+        "median": float(percentiles[-1]),
+        "std": round(float(np.sqrt((counts * (values - mean) ** 2).sum() / total)), 3),
+        "min": int(values[present[0]]),
+        "max": int(values[present[-1]]),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, percentiles)},
+    }
+
+
+def describe(values):
+    percentiles = np.percentile(values, PERCENTILES)
+    return {
+        "mean": round(float(values.mean()), 3),
+        "median": float(np.median(values)),
+        "std": round(float(values.std()), 3),
+        "min": int(values.min()),
+        "max": int(values.max()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, percentiles)},
+    }
+
+
+def histogram(marks, bins, weights=None):
+    counts, edges = np.histogram(marks, bins=bins, weights=weights)
+    return [
+        {"from": float(edges[i]), "to": float(edges[i + 1]), "count": int(counts[i])}
+        for i in range(len(counts))
+    ]
+
+
+def compute_stats(columns, bins=10):
+    _, ages, marks = columns.view()
+    if len(marks) == 0:
+        return {"count": 0}
+
+    age_min, age_max = int(ages.min()), int(ages.max())
+    marks_min, marks_max = int(marks.min()), int(marks.max())
+    age_span = age_max - age_min + 1
+    marks_span = marks_max - marks_min + 1
+    if age_span * marks_span <= max(len(marks), MIN_COUNT_CELLS):
+        return stats_by_counting(ages, marks, age_min, marks_min, age_span, marks_span, bins)
+    return stats_by_sorting(ages, marks, bins)
+
+
+def stats_by_counting(ages, marks, age_min, marks_min, age_span, marks_span, bins):
+    # ages and marks are small integer ranges, so one bincount over the
+    # (age, marks) grid gives every statistic without sorting a million rows
+    table = np.bincount((ages - age_min) * marks_span + (marks - marks_min),
+                        minlength=age_span * marks_span).reshape(age_span, marks_span)
+    marks_counts = table.sum(axis=0)
+    marks_values = np.arange(marks_min, marks_min + marks_span)
+
+    by_age = []
+    for row in np.flatnonzero(table.sum(axis=1)):
+        row_stats = describe_counts(table[row], marks_min)
+        by_age.append({
+            "student_age": age_min + int(row),
+            "count": int(table[row].sum()),
+            "mean_marks": row_stats["mean"],
+            "median_marks": row_stats["median"],
+            "min_marks": row_stats["min"],
+            "max_marks": row_stats["max"],
+        })
+
+    return {
+        "count": int(len(marks)),
+        "marks": describe_counts(marks_counts, marks_min),
+        "age": describe_counts(table.sum(axis=1), age_min),
+        "marks_histogram": histogram(marks_values, np.histogram_bin_edges(marks, bins=bins), marks_counts),
+        "by_age": by_age,
+    }
+
+
+def stats_by_sorting(ages, marks, bins):
+    # group by age: sort by (age, marks) once, then every group is a
+    # contiguous run and its median sits in the middle of the run
+    order = np.lexsort((marks, ages))
+    sorted_ages = ages[order]
+    sorted_marks = marks[order]
+    group_ages, starts, group_counts = np.unique(sorted_ages, return_index=True, return_counts=True)
+    sums = np.add.reduceat(sorted_marks, starts)
+    medians = (sorted_marks[starts + (group_counts - 1) // 2] + sorted_marks[starts + group_counts // 2]) / 2
+    mins = np.minimum.reduceat(sorted_marks, starts)
+    maxs = np.maximum.reduceat(sorted_marks, starts)
+
+    return {
+        "count": int(len(marks)),
+        "marks": describe(marks),
+        "age": describe(ages),
+        "marks_histogram": histogram(marks, bins),
+        "by_age": [
+            {
+                "student_age": int(group_ages[i]),
+                "count": int(group_counts[i]),
+                "mean_marks": round(float(sums[i] / group_counts[i]), 3),
+                "median_marks": float(medians[i]),
+                "min_marks": int(mins[i]),
+                "max_marks": int(maxs[i]),
+            }
+            for i in range(len(group_ages))
+        ],
+    }
@@ -1,15 +1,381 @@
+import asyncio
 import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+from .base import StudentStorage, run_io
+from .columns import StudentColumns, column_arrays
 
+# which backend open_store() opens, e.g. STUDENT_DB_BACKEND=sqlite
+BACKEND = os.environ.get("STUDENT_DB_BACKEND", "json")
+JSON_FILE = os.environ.get("STUDENT_DB_FILE", "students.json")
+SQLITE_FILE = os.environ.get("STUDENT_DB_SQLITE_FILE", "students.db")
+MMAP_FILE = os.environ.get("STUDENT_DB_MMAP_FILE", "students.bin")
 
 
-def setup_db():
-    file_name="students.json"
+class SortedIndex:
+    # row positions sorted by one column, with the sorted values next to them.
+    # never changed in place: merge() returns a new index, so a reader holding
+    # one always sees values and positions that match
+    __slots__ = ("values", "positions")
+
+    def __init__(self, values, positions):
+        self.values = values
+        self.positions = positions
+
+    @classmethod
+    def build(cls, column):
+        positions = np.argsort(column, kind="stable")
+        return cls(column[positions], positions)
+
+    def merge(self, column, start):
+        # adds rows start: of column, which were appended after this index was built
+        new_values = column[start:]
+        order = np.argsort(new_values, kind="stable")
+        new_values = new_values[order]
+        at = np.searchsorted(self.values, new_values, side="right")
+        return SortedIndex(np.insert(self.values, at, new_values), np.insert(self.positions, at, order + start))
+
+    def first_at_least(self, value):
+        return int(np.searchsorted(self.values, value, side="left"))
+
+
+class StudentView:
+    # everything a read needs, as of one committed batch. the writer builds
+    # the next view beside this one and publishes it in a single assignment;
+    # rows past count may already be in students but are not visible yet
+    __slots__ = ("students", "count", "ages", "marks", "id_index", "marks_index", "age_index")
+
+    def __init__(self, students, columns, previous=None):
+        ids, self.ages, self.marks = columns.view()
+        self.students = students
+        self.count = len(ids)
+        if previous is None:
+            self.id_index = SortedIndex.build(ids)
+            self.marks_index = SortedIndex.build(self.marks)
+            self.age_index = SortedIndex.build(self.ages)
+        else:
+            self.id_index = previous.id_index.merge(ids, previous.count)
+            self.marks_index = previous.marks_index.merge(self.marks, previous.count)
+            self.age_index = previous.age_index.merge(self.ages, previous.count)
+
+
+class PendingWrite:
+    def __init__(self, students, on_done=None):
+        self.students = students
+        self.on_done = on_done
+        self.done = threading.Event()
+        self.error = None
+
+
+class StudentStore(StudentStorage):
+    # keeps students.json in memory and reloads it only when the file changes.
+    # inserts are appended to a journal next to the snapshot and folded back
+    # into students.json once the journal grows past COMPACT_AFTER lines.
+    # a single writer thread groups concurrent inserts into one journal write
+    # every BATCH_WINDOW seconds or BATCH_RECORDS records.
+    # async handlers only stat the files every REFRESH_INTERVAL seconds to
+    # pick up edits made outside this process.
+    COMPACT_AFTER = 1000
+    BATCH_WINDOW = 0.005
+    BATCH_RECORDS = 500
+    REFRESH_INTERVAL = 1.0
+
+    def __init__(self, file_name="students.json"):
+        self.file_name = file_name
+        self.journal_name = os.path.splitext(file_name)[0] + ".journal"
+        self.students = []
+        self.by_id = {}
+        self.columns = StudentColumns()
+        self._view = StudentView(self.students, self.columns)
+        self.journal_count = 0
+        self._stat = None
+        # _lock only covers the duplicate check in _submit, which runs on the
+        # event loop; disk writes and rebuilding the view serialize on _io_lock
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._pending_ids = set()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._checked_at = 0.0
+
+    def _file_stat(self):
+        st = os.stat(self.file_name)
+        try:
+            jst = os.stat(self.journal_name)
+            journal = (jst.st_mtime_ns, jst.st_size)
+        except FileNotFoundError:
+            journal = None
+        return (st.st_mtime_ns, st.st_size, journal)
+
+    def load(self):
+        with self._io_lock:
+            stat = self._file_stat()
+            if stat == self._stat:
+                return
+            with open(self.file_name, 'r') as f:
+                self.students = json.load(f)
+            self.by_id = {s['student_id']: s for s in self.students}
+            self.journal_count = self._replay_journal()
+            self.build_indexes()
+            self.version += 1
+            self._stat = stat
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_name):
+            return 0
+        # a crash between compaction and truncating the journal leaves records
+        # that are already in the snapshot, so skip ids we have seen
+        count = 0
+        good_bytes = 0
+        with open(self.journal_name, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # torn last line from an interrupted append
+                    break
+                try:
+                    student = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                good_bytes += len(line)
+                count += 1
+                if student['student_id'] not in self.by_id:
+                    self.by_id[student['student_id']] = student
+                    self.students.append(student)
+            torn = f.seek(0, os.SEEK_END) > good_bytes
+        if torn:
+            # cut the torn tail off, otherwise the next append would land on the
+            # same line and be skipped, with everything after it, on replay
+            with open(self.journal_name, 'r+b') as f:
+                f.truncate(good_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+        return count
+
+    def build_indexes(self):
+        self.by_id = {s['student_id']: s for s in self.students}
+        self.columns = StudentColumns.from_students(self.students)
+        self._view = StudentView(self.students, self.columns)
+
+    def refresh(self):
+        if self._stat is None or self._file_stat() != self._stat:
+            self.load()
+        self._checked_at = time.monotonic()
+        return self.students
+
+    async def arefresh(self):
+        if self._stat is None or time.monotonic() - self._checked_at >= self.REFRESH_INTERVAL:
+            await run_io(self.refresh)
+
+    async def acount(self):
+        return self.count()
+
+    async def aget(self, student_id):
+        return self.get(student_id)
+
+    async def aexisting_ids(self, student_ids):
+        return self.existing_ids(student_ids)
+
+    async def apage(self, cursor=None, limit=100):
+        return self.page(cursor, limit)
+
+    async def afilter_by_marks_and_age(self, marks, age):
+        return self.filter_by_marks_and_age(marks, age)
+
+    def _write_snapshot(self, data):
+        tmp_name = self.file_name + ".tmp"
+        with open(tmp_name, 'w') as f:
+            # one dumps call without indent stays in the C encoder end to end
+            f.write(json.dumps(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, self.file_name)
+        with open(self.journal_name, 'w'):
+            pass
+        self.journal_count = 0
+
+    def write(self, data):
+        with self._io_lock:
+            self._write_snapshot(data)
+            self.students = data
+            self.build_indexes()
+            self.version += 1
+            self._stat = self._file_stat()
+
+    def add(self, student):
+        self.add_many([student])
+
+    def add_many(self, students):
+        # returns once the batch holding these records is on disk
+        pending = self._submit(students)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+
+    async def aadd(self, student):
+        await self.aadd_many([student])
+
+    async def aadd_many(self, students):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._submit(students, lambda p: loop.call_soon_threadsafe(future.set_result, None))
+        await future
+        if pending.error is not None:
+            raise pending.error
+
+    def _submit(self, students, on_done=None):
+        with self._lock:
+            new_ids = set()
+            for student in students:
+                student_id = student['student_id']
+                if student_id in self.by_id or student_id in self._pending_ids or student_id in new_ids:
+                    raise ValueError("Student with given ID already exists")
+                new_ids.add(student_id)
+            self._pending_ids |= new_ids
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+                self._writer.start()
+        pending = PendingWrite(students, on_done)
+        self._queue.put(pending)
+        return pending
+
+    def _writer_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            count = len(batch[0].students)
+            deadline = time.monotonic() + self.BATCH_WINDOW
+            while count < self.BATCH_RECORDS:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                count += len(pending.students)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        students = [s for pending in batch for s in pending.students]
+        try:
+            # converted before anything reaches disk, so a bad value can't
+            # leave a journal line that breaks every later load
+            arrays = column_arrays(students)
+            with self._io_lock:
+                if self.journal_count + len(students) >= self.COMPACT_AFTER:
+                    # this batch would trigger compaction anyway, so write it
+                    # straight into a new snapshot instead of the journal first
+                    self._write_snapshot(self.students + students)
+                else:
+                    with open(self.journal_name, 'a') as f:
+                        f.write("".join(json.dumps(s) + "\n" for s in students))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self.journal_count += len(students)
+                self._apply(students, arrays)
+                self._stat = self._file_stat()
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+        finally:
+            # by_id has the batch by now, so dropping the pending ids leaves
+            # no gap for a duplicate to get through _submit
+            with self._lock:
+                self._pending_ids.difference_update(s['student_id'] for s in students)
+            for pending in batch:
+                pending.done.set()
+                if pending.on_done is not None:
+                    pending.on_done(pending)
+
+    def _apply(self, students, arrays):
+        self.students.extend(students)
+        self.by_id.update((s['student_id'], s) for s in students)
+        self.columns.extend_arrays(arrays)
+        # sorting the batch and merging it in is a few array copies, cheaper
+        # than inserting row by row or rebuilding at any batch size
+        self._view = StudentView(self.students, self.columns, self._view)
+        # only once the view is published, so a reader that sees the new
+        # version can't cache a body encoded without the batch
+        self.version += 1
+
+    def all(self):
+        view = self._view
+        students = view.students
+        return students if len(students) == view.count else students[:view.count]
+
+    def count(self):
+        return self._view.count
+
+    def get(self, student_id):
+        return self.by_id.get(student_id)
+
+    def page(self, cursor=None, limit=100):
+        # records ordered by student_id, starting after the cursor id
+        view = self._view
+        index = view.id_index
+        start = 0 if cursor is None else int(np.searchsorted(index.values, cursor, side="right"))
+        positions = index.positions[start:start + limit].tolist()
+        next_cursor = int(index.values[start + limit - 1]) if start + limit < view.count else None
+        return [view.students[pos] for pos in positions], next_cursor
+
+    def filter_by_marks_and_age(self, marks, age):
+        view = self._view
+        total = view.count
+        marks_from = view.marks_index.first_at_least(marks)
+        age_from = view.age_index.first_at_least(age)
+        marks_count = total - marks_from
+        age_count = total - age_from
+
+        if min(marks_count, age_count) > total // 4:
+            # neither index is selective, a straight pass over the columns is cheaper
+            positions = np.flatnonzero((view.marks >= marks) & (view.ages >= age))
+        elif marks_count <= age_count:
+            # walk the smaller candidate range and check the other column on it
+            positions = view.marks_index.positions[marks_from:]
+            positions = np.sort(positions[view.ages[positions] >= age])
+        else:
+            positions = view.age_index.positions[age_from:]
+            positions = np.sort(positions[view.marks[positions] >= marks])
+        students = view.students
+        return [students[pos] for pos in positions.tolist()]
+
+
+_stores = {}
+
+
+def get_store(file_name="students.json"):
+    store = _stores.get(file_name)
+    if store is None:
+        store = _stores[file_name] = StudentStore(file_name)
+    return store
+
+
+_backend = None
+
+
+def open_store():
+    global _backend
+    if _backend is None:
+        if BACKEND == "sqlite":
+            from .sqlite_store import SqliteStudentStore
+            _backend = SqliteStudentStore(SQLITE_FILE, seed_file=JSON_FILE)
+        elif BACKEND == "mmap":
+            # shared by all uvicorn workers through the page cache
+            from .mmap_store import MmapStudentStore
+            _backend = MmapStudentStore(MMAP_FILE, seed_file=JSON_FILE)
+        elif BACKEND == "json":
+            _backend = get_store(JSON_FILE)
+        else:
+            raise ValueError(f"Unknown STUDENT_DB_BACKEND: {BACKEND}")
+    return _backend
 
 
 def get_db(file_name="students.json"):
-    with open(file_name,'r') as f:
-        return json.load(f)
-    
+    return get_store(file_name).refresh()
+
+
 def write_db(data, file_name="students.json"):
-    with open(file_name,'w') as f:
-        json.dump(data,f,indent=4)
+    get_store(file_name).write(data)
@@ -0,0 +1,225 @@
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import numpy as np
+from .base import StudentStorage, run_io
+from .database import StudentStore
+
+# students.bin layout: a fixed header, then fixed-size records in insert order.
+# the file is grown ahead of time and only the header's count says how many
+# records are live, so every worker can map it once and share the page cache.
+MAGIC = b"STUDBIN1"
+HEADER = struct.Struct("<8sQQQ")  # magic, generation, count, capacity
+HEADER_SIZE = 64
+NAME_BYTES = 48
+RECORD = np.dtype([("student_id", "<i8"), ("student_age", "<i4"),
+                   ("student_marks", "<i4"), ("student_name", f"S{NAME_BYTES}")])
+
+
+# (field, smallest, largest) for the fixed-width record columns
+LIMITS = [("student_id", -2**63, 2**63 - 1), ("student_age", -2**31, 2**31 - 1),
+          ("student_marks", -2**31, 2**31 - 1)]
+
+
+def to_records(students):
+    records = np.zeros(len(students), dtype=RECORD)
+    names = []
+    for student in students:
+        name = student['student_name'].encode("utf-8")
+        if len(name) > NAME_BYTES:
+            raise ValueError(f"student_name must be at most {NAME_BYTES} bytes")
+        for field, low, high in LIMITS:
+            if not low <= student[field] <= high:
+                raise ValueError(f"{field} must be between {low} and {high}")
+        names.append(name)
+    records["student_id"] = [s['student_id'] for s in students]
+    records["student_age"] = [s['student_age'] for s in students]
+    records["student_marks"] = [s['student_marks'] for s in students]
+    records["student_name"] = names
+    return records
+
+
+def to_dicts(records):
+    return [{"student_id": student_id, "student_name": name.decode("utf-8"),
+             "student_age": age, "student_marks": marks}
+            for student_id, age, marks, name in records.tolist()]
+
+
+class MappedColumns:
+    # the StudentColumns interface, read straight from the mapped file
+    def __init__(self, store):
+        self.store = store
+
+    def view(self):
+        records = self.store._state[0]
+        return records["student_id"], records["student_age"], records["student_marks"]
+
+
+class MmapStudentStore(StudentStorage):
+    # readers map students.bin and only remap when the file has grown past the
+    # mapping; a generation bump in the header tells them new rows are live.
+    # each worker keeps just a sorted id index (12 bytes a row) of its own.
+    def __init__(self, file_name="students.bin", seed_file=None):
+        self.file_name = file_name
+        if not os.path.exists(file_name):
+            self._create(seed_file)
+        self._fd = os.open(file_name, os.O_RDWR)
+        self._inode = os.fstat(self._fd).st_ino
+        self._lock = threading.Lock()
+        self._map = None
+        self._mapped_size = 0
+        self.generation = 0
+        self._state = (np.zeros(0, dtype=RECORD), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self.columns = MappedColumns(self)
+        self.refresh()
+
+    def _create(self, seed_file):
+        students = []
+        if seed_file and os.path.exists(seed_file):
+            # snapshot plus journal, so inserts not yet compacted come along
+            students = StudentStore(seed_file).refresh()
+        records = to_records(students)
+        capacity = max(1024, len(records))
+        tmp_name = f"{self.file_name}.{os.getpid()}.tmp"
+        with open(tmp_name, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, 1, len(records), capacity).ljust(HEADER_SIZE, b"\0"))
+            f.write(records.tobytes())
+            f.truncate(HEADER_SIZE + capacity * RECORD.itemsize)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            # link fails if another worker created the file first, so every
+            # worker ends up on the same inode
+            os.link(tmp_name, self.file_name)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_name)
+
+    def _read_header(self):
+        if self._map is not None:
+            magic, generation, count, capacity = HEADER.unpack_from(self._map, 0)
+        else:
+            magic, generation, count, capacity = HEADER.unpack(os.pread(self._fd, HEADER.size, 0))
+        if magic != MAGIC:
+            raise ValueError(f"{self.file_name} is not a student snapshot")
+        return generation, count, capacity
+
+    def _changed(self):
+        generation, count, capacity = self._read_header()
+        return generation != self.generation or count != len(self._state[0])
+
+    def refresh(self):
+        if self._changed():
+            with self._lock:
+                self._refresh_locked()
+
+    def _refresh_locked(self):
+        generation, count, capacity = self._read_header()
+        records, sorted_ids, order = self._state
+        old_count = len(records)
+        if generation == self.generation and count == old_count:
+            return
+        size = HEADER_SIZE + capacity * RECORD.itemsize
+        if size > self._mapped_size:
+            # numpy views keep the old mapping alive until they are dropped
+            self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+        records = np.frombuffer(self._map, dtype=RECORD, count=count, offset=HEADER_SIZE)
+        # records are append-only, so only the new tail needs merging into the index
+        new_positions = np.arange(old_count, count, dtype=np.int64)
+        new_ids = records["student_id"][old_count:count]
+        by_id = np.argsort(new_ids, kind="stable")
+        new_ids = new_ids[by_id]
+        at = np.searchsorted(sorted_ids, new_ids)
+        sorted_ids = np.insert(sorted_ids, at, new_ids)
+        order = np.insert(order, at, new_positions[by_id])
+        self._state = (records, sorted_ids, order)
+        self.generation = generation
+        self.version = generation
+
+    async def arefresh(self):
+        # the header check reads the mapping without the lock; merging new
+        # rows takes the lock a writer holds across flock and fsync, so that
+        # part runs on the io executor
+        if self._changed():
+            await run_io(self.refresh)
+
+    def all(self):
+        return to_dicts(self._state[0])
+
+    def count(self):
+        return len(self._state[0])
+
+    def get(self, student_id):
+        records, sorted_ids, order = self._state
+        i = np.searchsorted(sorted_ids, student_id)
+        if i < len(sorted_ids) and sorted_ids[i] == student_id:
+            return to_dicts(records[order[i:i + 1]])[0]
+        return None
+
+    def existing_ids(self, student_ids):
+        sorted_ids = self._state[1]
+        candidates = np.asarray(list(student_ids), dtype=np.int64)
+        return set(candidates[np.isin(candidates, sorted_ids)].tolist())
+
+    def add(self, student):
+        self.add_many([student])
+
+    def add_many(self, students):
+        new_records = to_records(students)
+        with self._lock:
+            # flock serializes writers across workers, the thread lock within one
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                # pick up rows other workers appended before checking for duplicates
+                self._refresh_locked()
+                generation, count, capacity = self._read_header()
+                new_ids = new_records["student_id"]
+                if len(np.unique(new_ids)) != len(new_ids) or np.isin(new_ids, self._state[1]).any():
+                    raise ValueError("Student with given ID already exists")
+                if count + len(new_records) > capacity:
+                    while count + len(new_records) > capacity:
+                        capacity *= 2
+                    os.ftruncate(self._fd, HEADER_SIZE + capacity * RECORD.itemsize)
+                os.pwrite(self._fd, new_records.tobytes(), HEADER_SIZE + count * RECORD.itemsize)
+                os.fsync(self._fd)
+                # the header goes last, so readers never see rows that are not fully written
+                os.pwrite(self._fd, HEADER.pack(MAGIC, generation + 1, count + len(new_records), capacity), 0)
+                os.fsync(self._fd)
+                self._refresh_locked()
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def page(self, cursor=None, limit=100):
+        records, sorted_ids, order = self._state
+        start = 0 if cursor is None else int(np.searchsorted(sorted_ids, cursor, side="right"))
+        positions = order[start:start + limit]
+        next_cursor = int(sorted_ids[start + limit - 1]) if start + limit < len(sorted_ids) else None
+        return to_dicts(records[positions]), next_cursor
+
+    def filter_by_marks_and_age(self, marks, age):
+        records = self._state[0]
+        mask = (records["student_marks"] >= marks) & (records["student_age"] >= age)
+        return to_dicts(records[mask])
+
+    def etag(self):
+        # the generation lives in the shared file, so every worker agrees on it
+        return f'"{self._inode}-{self.generation}"'
+
+    async def aetag(self):
+        return self.etag()
+
+    async def awarm(self):
+        # encoded_all isn't cached here, so encoding at startup would only
+        # spend time and leave nothing behind
+        pass
+
+    def encoded_all(self):
+        # no per-worker copy of the encoded list; that would defeat sharing the file
+        etag = self.etag()
+        body = json.dumps(self.all(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return etag, body
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import threading
+from .base import StudentStorage
+from .columns import StudentColumns, column_arrays
+from .database import StudentStore
+
+COLUMNS = ("student_id", "student_name", "student_age", "student_marks")
+SELECT = "SELECT student_id, student_name, student_age, student_marks FROM students"
+
+
+class SqliteStudentStore(StudentStorage):
+    # one connection per worker thread, reused across requests.
+    # a separate watch connection reads PRAGMA data_version, which changes
+    # whenever another connection commits, so writes from other workers or
+    # processes bump version and rebuild the column mirror.
+    def __init__(self, file_name="students.db", seed_file=None):
+        self.file_name = file_name
+        self._local = threading.local()
+        # serializes inserts with the version bump and column append, and
+        # guards the watch connection
+        self._lock = threading.Lock()
+        conn = self._conn()
+        with conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS students (
+                                student_id INTEGER PRIMARY KEY,
+                                student_name TEXT NOT NULL,
+                                student_age INTEGER NOT NULL,
+                                student_marks INTEGER NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_students_marks ON students(student_marks)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_students_age ON students(student_age)")
+        if seed_file and os.path.exists(seed_file) and self.count() == 0:
+            self._seed(seed_file)
+        self._watch = sqlite3.connect(self.file_name, check_same_thread=False)
+        self._data_version = self._read_data_version()
+        self.columns = StudentColumns.from_students(self.all())
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.file_name)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _seed(self, seed_file):
+        # snapshot plus journal, so inserts not yet compacted come along
+        students = StudentStore(seed_file).refresh()
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO students VALUES (?, ?, ?, ?)",
+                             [tuple(s[c] for c in COLUMNS) for s in students])
+
+    def _rows(self, sql, params=()):
+        return [dict(zip(COLUMNS, row)) for row in self._conn().execute(sql, params)]
+
+    def _read_data_version(self):
+        return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        with self._lock:
+            data_version = self._read_data_version()
+            if data_version != self._data_version:
+                self.columns = StudentColumns.from_students(self.all())
+                self.version += 1
+                self._data_version = data_version
+
+    def all(self):
+        return self._rows(SELECT + " ORDER BY student_id")
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def get(self, student_id):
+        rows = self._rows(SELECT + " WHERE student_id = ?", (student_id,))
+        return rows[0] if rows else None
+
+    def add(self, student):
+        self.add_many([student])
+
+    def add_many(self, students):
+        conn = self._conn()
+        arrays = column_arrays(students)
+        with self._lock:
+            # our own commit also moves data_version; only skip the rebuild
+            # when nothing else had committed since the last check
+            unchanged = self._read_data_version() == self._data_version
+            try:
+                with conn:
+                    conn.executemany("INSERT INTO students VALUES (?, ?, ?, ?)",
+                                     [tuple(s[c] for c in COLUMNS) for s in students])
+            except sqlite3.IntegrityError:
+                raise ValueError("Student with given ID already exists")
+            self.version += 1
+            if unchanged:
+                self.columns.extend_arrays(arrays)
+                self._data_version = self._read_data_version()
+
+    def existing_ids(self, student_ids):
+        student_ids = list(student_ids)
+        found = set()
+        # stay under sqlite's bound-parameter limit
+        for i in range(0, len(student_ids), 500):
+            chunk = student_ids[i:i + 500]
+            sql = f"SELECT student_id FROM students WHERE student_id IN ({','.join('?' * len(chunk))})"
+            found.update(row[0] for row in self._conn().execute(sql, chunk))
+        return found
+
+    def page(self, cursor=None, limit=100):
+        # fetch one extra row to know whether another page follows
+        if cursor is None:
+            rows = self._rows(SELECT + " ORDER BY student_id LIMIT ?", (limit + 1,))
+        else:
+            rows = self._rows(SELECT + " WHERE student_id > ? ORDER BY student_id LIMIT ?", (cursor, limit + 1))
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1]["student_id"]
+        return rows, None
+
+    def filter_by_marks_and_age(self, marks, age):
+        return self._rows(SELECT + " WHERE student_marks >= ? AND student_age >= ? ORDER BY student_id",
+                          (marks, age))
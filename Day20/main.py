@@ -1,50 +1,267 @@
-from fastapi import FastAPI, HTTPException, Header, Query, Depends
-from pydantic import BaseModel
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Header, Query, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, ValidationError
+from fastapi.responses import StreamingResponse, Response
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.responses import FastJSONResponse
+from shared.metrics import install_metrics, timed
+from shared.etag import etag_matches
+from contextlib import asynccontextmanager
 from db import database
+from db.base import run_io
+from db.changes import ChangeFeed
 from validate_token import check_token
 import json
+import time
     
 
-app = FastAPI(dependencies=[Depends(check_token.verify_token), Depends(database.setup_db)])
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # open and index the store once, before the first request
+    start=time.perf_counter()
+    check_token.load_api_keys()
+    store=await run_io(database.open_store)
+    await run_io(store.refresh)
+    count=await store.acount()
+    await store.awarm()
+    app.state.store=store
+    app.state.changes=ChangeFeed()
+    app.state.startup={"backend": database.BACKEND, "students": count,
+                       "seconds": round(time.perf_counter()-start, 3)}
+    print(f"Loaded {count} students from the {database.BACKEND} backend in {app.state.startup['seconds']}s")
+    yield
+
+
+async def get_store(request: Request):
+    store=request.app.state.store
+    with timed("storage"):
+        await store.arefresh()
+    return store
+
+
+async def authenticate(x_api_key: str = Header(...)):
+    with timed("auth"):
+        return await check_token.verify_token(x_api_key)
+
+
+app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan,
+              dependencies=[Depends(authenticate)])
+install_metrics(app)
+# the stores keep these as int64 columns, so larger values get a 422 here
+INT64_MIN=-2**63
+INT64_MAX=2**63-1
+
 class Student(BaseModel):
-    student_id:int
+    student_id:int=Field(..., ge=INT64_MIN, le=INT64_MAX)
     student_name:str
-    student_age:int
-    student_marks:int
+    student_age:int=Field(..., ge=INT64_MIN, le=INT64_MAX)
+    student_marks:int=Field(..., ge=INT64_MIN, le=INT64_MAX)
+
+BULK_BATCH_SIZE=5000
+MAX_REPORTED_ERRORS=1000
 
 @app.get("/students")
-def get_students(db=Depends(database.get_db)):
+async def get_students(request: Request, limit: int= Query(None, ge=1), cursor: int= Query(None),
+                 format: str= Query("json"),
+                 store=Depends(get_store)):
        
-    if db:
-        return JSONResponse(content=db, status_code=200,headers={"version":"1.1.0"})
-    else:
+    with timed("storage"):
+        count=await store.acount()
+    if count==0:
         raise HTTPException(status_code=404, detail="No data found")
+
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+
+    if format=="ndjson":
+        return StreamingResponse(store.iter_ndjson(cursor, limit), status_code=200,
+                                 media_type="application/x-ndjson", headers={"version":"1.1.0"})
+
+    if limit is None and cursor is None:
+        with timed("storage"):
+            etag=await store.aetag()
+        headers={"version":"1.1.0", "ETag":etag}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        with timed("storage"):
+            etag, body=await store.aencoded_all()
+        headers["ETag"]=etag
+        return FastJSONResponse(content=body, status_code=200, headers=headers)
+
+    with timed("storage"):
+        students, next_cursor=await store.apage(cursor, limit or 100)
+    headers={"version":"1.1.0"}
+    if next_cursor is not None:
+        headers["next-cursor"]=str(next_cursor)
+    return FastJSONResponse(content=students, status_code=200,headers=headers)
     
 
 #query parameter
 @app.get("/students/marks")
-def get_students_marks(marks: int= Query(...),age: int= Query(...),
-                       db=Depends(database.get_db)):
-    student_list=[]
-    for student in db:
-        if student['student_marks']>=marks and student['student_age']>=age:
-            student_list.append(student)
+async def get_students_marks(marks: int= Query(...),age: int= Query(...),
+                       store=Depends(get_store)):
+    with timed("storage"):
+        student_list=await store.afilter_by_marks_and_age(marks, age)
     
     if student_list:
-        return JSONResponse(content=student_list, status_code=200,headers={"version":"1.1.0"})
+        return FastJSONResponse(content=student_list, status_code=200,headers={"version":"1.1.0"})
     else:
         raise HTTPException(status_code=404, detail="No data found")
 
 
+@app.get("/students/stats")
+async def get_students_stats(bins: int= Query(10, ge=1, le=100), store=Depends(get_store)):
+    with timed("storage"):
+        stats=await store.astats(bins)
+    if stats["count"]==0:
+        raise HTTPException(status_code=404, detail="No data found")
+    return FastJSONResponse(content=stats, status_code=200,headers={"version":"1.1.0"})
+
+
+@app.get("/students/changes")
+async def get_student_changes(request: Request, since: int= Query(None, ge=0), format: str= Query("sse"),
+                              last_event_id: str= Header(None)):
+    # long-lived stream of inserts committed through this process. clients
+    # resume with ?since=<seq> or, for SSE, the Last-Event-ID header
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be sse or ndjson")
+    if since is None and last_event_id is not None:
+        try:
+            since=int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID must be a sequence number")
+    media_type="text/event-stream" if format=="sse" else "application/x-ndjson"
+    return StreamingResponse(request.app.state.changes.stream(since, format), status_code=200,
+                             media_type=media_type,
+                             headers={"version":"1.1.0", "Cache-Control":"no-cache", "X-Accel-Buffering":"no"})
+
+
 @app.post("/students")
-def add_student(student:Student,
-                db=Depends(database.get_db)):    
+async def add_student(request: Request, student:Student,
+                store=Depends(get_store)):    
     
-    for stud in db:
-        if stud['student_id']==student.student_id:
-            raise HTTPException(status_code=400, detail="Student with given ID already exists")
-        
-    db.append(student.dict())
-    database.write_db(db)
-    return JSONResponse(content={"message":"Student added successfully"}, status_code=201,headers={"version":"1.1.0"})
\ No newline at end of file
+    student=student.dict()
+    try:
+        with timed("storage"):
+            await store.aadd(student)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    request.app.state.changes.publish([student])
+    return FastJSONResponse(content={"message":"Student added successfully"}, status_code=201,headers={"version":"1.1.0"})
+
+
+async def read_bulk_records(request: Request):
+    # yields (line, record, error) from a JSON array or a streamed NDJSON body
+    stream=request.stream()
+    head=b""
+    async for chunk in stream:
+        head+=chunk
+        if head.strip():
+            break
+
+    if head.lstrip().startswith(b"["):
+        body=head+b"".join([chunk async for chunk in stream])
+        try:
+            # a million-record array takes seconds to parse, so not on the event loop
+            records=await run_in_threadpool(json.loads, body)
+        except json.JSONDecodeError as e:
+            yield 0, None, f"invalid JSON array: {e}"
+            return
+        for line, record in enumerate(records, 1):
+            yield line, record, None
+        return
+
+    line=0
+    buffer=head
+    while True:
+        *lines, buffer=buffer.split(b"\n")
+        for raw in lines:
+            line+=1
+            if raw.strip():
+                yield parse_ndjson_line(line, raw)
+        try:
+            buffer+=await stream.__anext__()
+        except StopAsyncIteration:
+            break
+    if buffer.strip():
+        yield parse_ndjson_line(line+1, buffer)
+
+
+def parse_ndjson_line(line, raw):
+    try:
+        return line, json.loads(raw), None
+    except json.JSONDecodeError as e:
+        return line, None, f"invalid JSON: {e}"
+
+
+def validate_batch(batch, seen_ids):
+    valid=[]
+    errors=[]
+    for line, record in batch:
+        if not isinstance(record, dict):
+            errors.append({"line": line, "error": "record must be a JSON object"})
+            continue
+        try:
+            student=Student(**record).dict()
+        except ValidationError as e:
+            errors.append({"line": line, "error": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+            continue
+        if student["student_id"] in seen_ids:
+            errors.append({"line": line, "error": "duplicate student_id in request"})
+            continue
+        seen_ids.add(student["student_id"])
+        valid.append((line, student))
+    return valid, errors
+
+
+@app.post("/students/bulk")
+async def add_students_bulk(request: Request, store=Depends(get_store)):
+    students=[]
+    errors=[]
+    seen_ids=set()
+
+    async def flush(batch):
+        valid, batch_errors=await run_in_threadpool(validate_batch, batch, seen_ids)
+        errors.extend(batch_errors)
+        with timed("storage"):
+            existing=await store.aexisting_ids([s["student_id"] for _, s in valid])
+        for line, student in valid:
+            if student["student_id"] in existing:
+                errors.append({"line": line, "error": "Student with given ID already exists"})
+            else:
+                students.append(student)
+
+    batch=[]
+    async for line, record, error in read_bulk_records(request):
+        if error is not None:
+            errors.append({"line": line, "error": error})
+            continue
+        batch.append((line, record))
+        if len(batch)>=BULK_BATCH_SIZE:
+            await flush(batch)
+            batch=[]
+    if batch:
+        await flush(batch)
+
+    if students:
+        try:
+            with timed("storage"):
+                await store.aadd_many(students)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        request.app.state.changes.publish(students)
+
+    errors.sort(key=lambda e: e["line"])
+    content={"inserted": len(students), "failed": len(errors), "errors": errors[:MAX_REPORTED_ERRORS]}
+    return FastJSONResponse(content=content, status_code=201 if students else 400,headers={"version":"1.1.0"})
+
+
+@app.get("/students/{student_id}")
+async def get_student(student_id: int, store=Depends(get_store)):
+    with timed("storage"):
+        student=await store.aget(student_id)
+    if student is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return FastJSONResponse(content=student, status_code=200,headers={"version":"1.1.0"})
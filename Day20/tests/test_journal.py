@@ -0,0 +1,36 @@
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# the repo root, for the shared package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from db.database import StudentStore
+
+
+def student(student_id):
+    return {"student_id": student_id, "student_name": f"Student{student_id}",
+            "student_age": 20, "student_marks": 50}
+
+
+def open_store(snapshot):
+    store = StudentStore(str(snapshot))
+    store.refresh()
+    return store
+
+
+def test_insert_after_torn_journal_line_survives_restart(tmp_path):
+    snapshot = tmp_path / "students.json"
+    snapshot.write_text(json.dumps([student(1)]))
+    open_store(snapshot).add(student(2))
+
+    # a crash in the middle of an append leaves half a record behind
+    with open(tmp_path / "students.journal", 'a') as f:
+        f.write('{"student_id": 9, "student_na')
+
+    restarted = open_store(snapshot)
+    assert restarted.get(9) is None
+    restarted.add(student(3))
+
+    reopened = open_store(snapshot)
+    assert [reopened.get(i) for i in (1, 2, 3)] == [student(1), student(2), student(3)]
+    assert reopened.count() == 3
@@ -1,4 +1,91 @@
+import hashlib
+import json
+import os
+from time import monotonic
 from fastapi import Header, HTTPException
-def verify_token(x_api_key: str = Header(...)):
-    if x_api_key != "mysecretkey":
-        raise HTTPException(status_code=401, detail="Unauthorized")
\ No newline at end of file
+
+API_KEYS_FILE = os.environ.get("API_KEYS_FILE", "api_keys.json")
+# used when there is no keys file; the hash is of "mysecretkey"
+DEFAULT_KEYS = [{"client": "default", "rate": 1000, "burst": 2000,
+                 "key_hash": "2afe16a6d630d94cd07c68d5e35568655bf5f60bef29c4f1321fc857816afec9"}]
+
+
+class TokenBucket:
+    # verify_token runs on the event loop, so take() is never entered by two
+    # requests at once and needs no lock
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+
+    def take(self):
+        # 0.0 when the request may go ahead, otherwise seconds until a token is free
+        now = monotonic()
+        tokens = self.tokens + (now - self.updated) * self.rate
+        if tokens > self.capacity:
+            tokens = self.capacity
+        self.updated = now
+        if tokens >= 1:
+            self.tokens = tokens - 1
+            return 0.0
+        self.tokens = tokens
+        return (1 - tokens) / self.rate
+
+
+class ApiClient:
+    __slots__ = ("name", "bucket")
+
+    def __init__(self, name, bucket):
+        self.name = name
+        self.bucket = bucket
+
+
+_clients = None
+
+
+def hash_key(key):
+    return hashlib.sha256(key.encode()).digest()
+
+
+def load_api_keys(file_name=API_KEYS_FILE):
+    # entries carry the sha256 hex of each key, never the key itself
+    global _clients
+    if os.path.exists(file_name):
+        with open(file_name, 'r') as f:
+            entries = json.load(f)
+    else:
+        entries = DEFAULT_KEYS
+    clients = {}
+    for entry in entries:
+        clients[bytes.fromhex(entry["key_hash"])] = ApiClient(
+            entry["client"], TokenBucket(float(entry["rate"]), float(entry["burst"])))
+    _clients = clients
+    return clients
+
+
+def lookup_client(x_api_key):
+    # the table is keyed by sha256 digest, so the dict lookup is the
+    # comparison; only digests are held in memory, never the keys
+    if _clients is None:
+        load_api_keys()
+    return _clients.get(hash_key(x_api_key))
+
+
+async def verify_token(x_api_key: str = Header(...)):
+    client = lookup_client(x_api_key)
+    if client is None:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    retry_after = client.bucket.take()
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many requests",
+                            headers={"Retry-After": str(max(1, round(retry_after)))})
+    return client.name
+
+
+if __name__ == "__main__":
+    # prints an api keys file entry: python -m validate_token.check_token <client> <key>
+    import sys
+    print(json.dumps({"client": sys.argv[1], "key_hash": hash_key(sys.argv[2]).hex(), "rate": 1000, "burst": 2000}))
@@ -1,59 +1,114 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, status
+from fastapi.responses import Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from fastapi.responses import JSONResponse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.responses import FastJSONResponse
+from shared.metrics import install_metrics, timed
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
-import json
+from auth import signing_keys
+from auth.passwords import UserStore
+from auth.revocation import RevocationList
+from auth.token_cache import TokenCache
+from encoded_file import EncodedJSONFile, accepts_gzip
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import secrets
 
-app = FastAPI()
-SECRET_KEY = "p8Xw!7zQ2rT#v9LmS4eY@1bN6uJ$k5HcG0fVxZ3tWqE8sRjD"
+app = FastAPI(default_response_class=FastJSONResponse)
+install_metrics(app)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-fake_users_db = {
-    "username":"testuser",
-    "password":"testpass"
-}
+# file reads from async handlers run here so the event loop never blocks on disk
+file_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="file-io")
+users = UserStore.load()
+token_cache = TokenCache()
+revoked_tokens = RevocationList()
+signing_keys.load_signing_keys()
+students_file = EncodedJSONFile("students.json")
 
 def create_access_token(data: dict):
     to_encode = data.copy()
-    print(to_encode)
-    expiry = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expiry})
-    token=jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # jose turns exp into a UTC timestamp, so the datetime has to be UTC too
+    expiry = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expiry, "jti": secrets.token_hex(16)})
+    kid, secret = signing_keys.active_key()
+    token=jwt.encode(to_encode, secret, algorithm=ALGORITHM, headers={"kid": kid})
     return token
 
 @app.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    if form_data.username != fake_users_db["username"] or form_data.password != fake_users_db["password"]:
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    # PBKDF2 takes tens of milliseconds, so it runs on the bounded password pool
+    with timed("password"):
+        valid = await users.averify(form_data.username, form_data.password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     
     access_token= create_access_token({"sub": form_data.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def decode_access_token(token: str):
+    # (username, jti, kid, exp) of a validly signed token, else None
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-        return username
+        kid = jwt.get_unverified_header(token).get("kid")
+        secret = signing_keys.key_for(kid)
+        if secret is None:
+            return None
+        payload = jwt.decode(token, secret, algorithms=[ALGORITHM])
     except JWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
+        return None
+    if payload.get("sub") is None or payload.get("jti") is None:
+        return None
+    return payload["sub"], payload["jti"], kid, payload.get("exp")
+
+
+async def get_token_claims(token: str = Depends(oauth2_scheme)):
+    with timed("auth"):
+        claims = token_cache.get(token)
+        if claims is None:
+            claims = decode_access_token(token)
+            if claims is None:
+                raise HTTPException(status_code=401, detail="Could not validate credentials")
+            token_cache.put(token, claims, claims[3])
+        # checked on every request, cached or not, so revoking a token takes
+        # effect at once and removing its key from the key file within a second
+        if revoked_tokens.is_revoked(claims[1]) or signing_keys.key_for(claims[2]) is None:
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+        return claims
+
+
+async def get_current_user(claims: tuple = Depends(get_token_claims)):
+    return claims[0]
+
+
+@app.post("/logout")
+async def logout(claims: tuple = Depends(get_token_claims)):
+    revoked_tokens.revoke(claims[1], claims[3])
+    return FastJSONResponse(content={"message": "Token revoked"}, status_code=200)
+
+
 @app.get("/getuser") 
-def get_user(current_user: str = Depends(get_current_user)):
-    return JSONResponse(content={"username": current_user}, status_code=200)
+async def get_user(current_user: str = Depends(get_current_user)):
+    return FastJSONResponse(content={"username": current_user}, status_code=200)
 
 
 @app.get("/students")
-def get_students(current_user: str = Depends(get_current_user)):
+async def get_students(current_user: str = Depends(get_current_user),
+                       accept_encoding: str = Header(None)):
     if current_user:       
-        with open("students.json", "r") as f:
-            data = f.read()
-            students = json.loads(data)
-            return JSONResponse(content=students, status_code=200)
+        with timed("storage"):
+            # the encoded bytes are reused until students.json changes on disk
+            if students_file.needs_check():
+                await asyncio.get_running_loop().run_in_executor(file_executor, students_file.refresh)
+        if accepts_gzip(accept_encoding):
+            return Response(content=students_file.body("gzip"), status_code=200, media_type="application/json",
+                            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+        return FastJSONResponse(content=students_file.body(), status_code=200,
+                                headers={"Vary": "Accept-Encoding"})
     else:
         raise HTTPException(status_code=404, detail="No data found")
\ No newline at end of file
@@ -0,0 +1,67 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+USERS_FILE = os.environ.get("USERS_FILE", "users.json")
+# PBKDF2-SHA256 rounds for new hashes; stored hashes keep the count they were made with
+PASSWORD_ITERATIONS = int(os.environ.get("PASSWORD_ITERATIONS", "600000"))
+# used when there is no users file, so a fresh checkout still runs
+DEFAULT_USERS = [{"username": "testuser", "password": "testpass"}]
+ALGORITHM = "pbkdf2_sha256"
+
+# pbkdf2_hmac releases the GIL, so a few threads hash in parallel while the
+# event loop keeps serving requests. the pool size caps how many cores a
+# burst of logins can take from everything else.
+password_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("PASSWORD_WORKERS", "2")),
+                                       thread_name_prefix="password")
+
+
+def hash_password(password, iterations=PASSWORD_ITERATIONS, salt=None):
+    salt = salt or secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return "$".join([ALGORITHM, str(iterations), base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+
+def verify_password(password, password_hash):
+    algorithm, iterations, salt, digest = password_hash.split("$")
+    if algorithm != ALGORITHM:
+        raise ValueError(f"unsupported password hash {algorithm!r}")
+    expected = base64.b64decode(digest)
+    actual = hashlib.pbkdf2_hmac("sha256", password.encode(), base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(actual, expected)
+
+
+class UserStore:
+    # username -> password hash. unknown users are checked against a dummy
+    # hash, so a failed login takes as long whether or not the user exists.
+    def __init__(self, users):
+        self._hashes = users
+        self._dummy_hash = hash_password(secrets.token_hex(16))
+
+    @classmethod
+    def load(cls, file_name=USERS_FILE):
+        if os.path.exists(file_name):
+            with open(file_name, 'r') as f:
+                entries = json.load(f)
+            return cls({entry["username"]: entry["password_hash"] for entry in entries})
+        return cls({entry["username"]: hash_password(entry["password"]) for entry in DEFAULT_USERS})
+
+    def verify(self, username, password):
+        password_hash = self._hashes.get(username)
+        valid = verify_password(password, password_hash or self._dummy_hash)
+        return valid and password_hash is not None
+
+    async def averify(self, username, password):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, self.verify, username, password)
+
+
+if __name__ == "__main__":
+    # prints a users file entry: python -m auth.passwords <username> <password>
+    import sys
+    print(json.dumps({"username": sys.argv[1], "password_hash": hash_password(sys.argv[2])}))
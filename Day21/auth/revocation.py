@@ -0,0 +1,29 @@
+import time
+
+# expired entries are dropped once the table has grown this much since the last prune
+PRUNE_AFTER = 1024
+
+
+class RevocationList:
+    # jti -> exp of revoked tokens. a revoked token only needs remembering
+    # until it would have expired anyway, so the table stays as small as the
+    # number of live revoked tokens. the non-revoked path is one dict probe.
+    def __init__(self):
+        self._revoked = {}
+        self._prune_at = PRUNE_AFTER
+
+    def revoke(self, jti, exp):
+        self._revoked[jti] = exp
+        if len(self._revoked) >= self._prune_at:
+            self.prune()
+            self._prune_at = len(self._revoked) + PRUNE_AFTER
+
+    def is_revoked(self, jti):
+        return jti in self._revoked
+
+    def prune(self, now=None):
+        now = time.time() if now is None else now
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+
+    def __len__(self):
+        return len(self._revoked)
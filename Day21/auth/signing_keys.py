@@ -0,0 +1,80 @@
+import json
+import logging
+import os
+import time
+
+SIGNING_KEYS_FILE = os.environ.get("SIGNING_KEYS_FILE", "signing_keys.json")
+# used when there is no key file, so a fresh checkout still runs
+DEFAULT_KEYS = {"active": "default", "keys": {"default": "p8Xw!7zQ2rT#v9LmS4eY@1bN6uJ$k5HcG0fVxZ3tWqE8sRjD"}}
+# how often the key file's mtime is checked; in between keys come from memory
+REFRESH_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+# (active kid, {kid: secret}), replaced in one assignment so readers never
+# see an active kid that is missing from the table. every token names its
+# key in the kid header, so rotating means adding a key to the file and
+# making it active while old tokens still verify against theirs; removing
+# a key from the file retires it, including for tokens already cached.
+_table = None
+_file_name = SIGNING_KEYS_FILE
+_stat = None
+_checked_at = 0.0
+
+
+def _file_stat(file_name):
+    try:
+        st = os.stat(file_name)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_signing_keys(file_name=SIGNING_KEYS_FILE):
+    global _table, _file_name, _stat, _checked_at
+    stat = _file_stat(file_name)
+    if stat is not None:
+        with open(file_name, 'r') as f:
+            config = json.load(f)
+    else:
+        config = DEFAULT_KEYS
+    if config["active"] not in config["keys"]:
+        raise ValueError(f"active signing key {config['active']!r} is not in the key table")
+    _table = (config["active"], dict(config["keys"]))
+    _file_name = file_name
+    _stat = stat
+    _checked_at = time.monotonic()
+    return _table[1]
+
+
+def _current():
+    # the key table, reloaded when the file has changed since the last check
+    global _stat, _checked_at
+    if _table is None:
+        load_signing_keys()
+    elif time.monotonic() - _checked_at >= REFRESH_INTERVAL:
+        _checked_at = time.monotonic()
+        stat = _file_stat(_file_name)
+        # a file that went away keeps the keys it had; falling back to the
+        # built-in default would make its secret valid again
+        if stat is not None and stat != _stat:
+            try:
+                load_signing_keys(_file_name)
+            except (OSError, ValueError, KeyError) as e:
+                # half-written or broken edits keep the current keys until fixed
+                _stat = stat
+                logger.warning("Reloading %s failed, keeping the current keys: %s", _file_name, e)
+    return _table
+
+
+def active_key():
+    # (kid, secret) new tokens are signed with
+    active, keys = _current()
+    return active, keys[active]
+
+
+def key_for(kid):
+    # kid comes from an unverified header, so it can be any JSON value
+    if not isinstance(kid, str):
+        return None
+    return _current()[1].get(kid)
@@ -0,0 +1,52 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES = 10000
+# tokens without an exp claim are still re-verified this often
+MAX_TTL = 300
+
+
+def token_digest(token):
+    # the cache never holds the bearer tokens themselves
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class TokenCache:
+    # LRU of tokens that already passed jwt.decode, keyed by a digest of the
+    # token and holding the claims callers need until the token's exp. a
+    # tampered token is a different string, so it misses and goes through
+    # the full decode. used from the event loop only, so no lock.
+    def __init__(self, max_entries=MAX_ENTRIES, max_ttl=MAX_TTL):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        # the cached claims, or None when the token has to be decoded
+        key = token_digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        claims, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, token, claims, exp=None):
+        expires_at = time.time() + self.max_ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        self._entries[token_digest(token)] = (claims, expires_at)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.load_test import run_load
+from shared.local_server import free_port, wait_for_port
+from benchmark_login_load import get_token, login_body, start_server
+from OAuth_Example import create_access_token, decode_access_token
+from auth.token_cache import TokenCache
+
+# token encode/decode throughput by payload size, then /login and /getuser
+# end to end through uvicorn. writes a JSON report to compare between runs.
+# example:
+#   python benchmark_auth.py --payload-sizes 0,256,1024,4096 -n 2000 -o auth.json
+
+
+def ops_per_second(func, arg, seconds):
+    # runs func until seconds have passed, checking the clock every 100 calls
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        for _ in range(100):
+            func(arg)
+        calls += 100
+        now = time.perf_counter()
+        if now >= deadline:
+            return round(calls / (now - start), 1)
+
+
+def token_benchmarks(payload_sizes, seconds):
+    results = {}
+    for size in payload_sizes:
+        claims = {"sub": "testuser"}
+        if size:
+            claims["data"] = "x" * size
+        token = create_access_token(claims)
+        assert decode_access_token(token) is not None
+        cache = TokenCache()
+        decoded = decode_access_token(token)
+        cache.put(token, decoded, decoded[3])
+        results[str(size)] = {
+            "token_bytes": len(token),
+            "encode_ops": ops_per_second(create_access_token, claims, seconds),
+            "decode_ops": ops_per_second(decode_access_token, token, seconds),
+            "cache_hit_ops": ops_per_second(cache.get, token, seconds),
+        }
+        print(f"payload {size}B: {results[str(size)]}")
+    return results
+
+
+async def endpoint_benchmarks(args):
+    port = free_port()
+    process = start_server(port, args.iterations, args.password_workers)
+    try:
+        wait_for_port(port, process)
+        token = get_token(port)
+        url = f"http://127.0.0.1:{port}"
+        results = {
+            "/login": await run_load(f"{url}/login", "POST",
+                                     {"Content-Type": "application/x-www-form-urlencoded"}, login_body(),
+                                     args.login_concurrency, args.logins),
+            "/getuser": await run_load(f"{url}/getuser", headers={"Authorization": f"Bearer {token}"},
+                                       concurrency=args.concurrency, total=args.requests),
+        }
+    finally:
+        process.terminate()
+        process.wait()
+    for path, result in results.items():
+        print(f"{path}: {result['rps']} rps, p50 {result['p50_ms']}ms, p99 {result['p99_ms']}ms")
+    return results
+
+
+async def main(args):
+    report = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "password_iterations": args.iterations,
+        "tokens": token_benchmarks(args.payload_sizes, args.seconds),
+        "endpoints": await endpoint_benchmarks(args),
+    }
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"Wrote {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Day21 token issue and verify")
+    parser.add_argument("--payload-sizes", default="0,256,1024,4096,16384",
+                        type=lambda value: [int(v) for v in value.split(",")],
+                        help="bytes of extra claim data per token")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per encode/decode measurement")
+    parser.add_argument("--iterations", type=int, default=600000, help="PBKDF2 rounds for /login")
+    parser.add_argument("--password-workers", type=int, default=2)
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("-n", "--requests", type=int, default=5000, help="/getuser requests")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=8)
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    asyncio.run(main(parser.parse_args()))
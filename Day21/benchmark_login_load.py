@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.load_test import run_load
+from shared.local_server import free_port, wait_for_port
+
+# runs OAuth_Example under uvicorn and measures /getuser and /students latency
+# on their own, then again while a stream of logins keeps the password pool busy.
+# example:
+#   python benchmark_login_load.py --iterations 600000 -c 32 -n 5000 --login-concurrency 16
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+USERNAME = "testuser"
+PASSWORD = "testpass"
+
+
+def start_server(port, iterations, password_workers):
+    env = dict(os.environ, PASSWORD_ITERATIONS=str(iterations), PASSWORD_WORKERS=str(password_workers))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "OAuth_Example:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+def login_body():
+    return urllib.parse.urlencode({"username": USERNAME, "password": PASSWORD}).encode()
+
+
+def get_token(port):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/login", data=login_body())
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["access_token"]
+
+
+async def protected_routes(port, token, args):
+    headers = {"Authorization": f"Bearer {token}"}
+    results = {}
+    for path in ("/getuser", "/students"):
+        results[path] = await run_load(f"http://127.0.0.1:{port}{path}", headers=headers,
+                                       concurrency=args.concurrency, total=args.requests)
+    return results
+
+
+async def logins(port, args, stop):
+    # keeps login_concurrency logins in flight until the protected runs finish
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    results = []
+    start = time.perf_counter()
+    while not stop.is_set():
+        results.append(await run_load(f"http://127.0.0.1:{port}/login", "POST", headers, login_body(),
+                                      args.login_concurrency, args.login_concurrency))
+    elapsed = time.perf_counter() - start
+    total = sum(r["requests"] for r in results)
+    statuses = {}
+    for r in results:
+        for status, count in r["statuses"].items():
+            statuses[status] = statuses.get(status, 0) + count
+    return {"requests": total, "seconds": round(elapsed, 3), "rps": round(total / elapsed, 1),
+            "statuses": statuses}
+
+
+async def main(args):
+    port = free_port()
+    process = start_server(port, args.iterations, args.password_workers)
+    try:
+        wait_for_port(port, process)
+        token = get_token(port)
+        report = {"iterations": args.iterations, "password_workers": args.password_workers,
+                  "concurrency": args.concurrency, "login_concurrency": args.login_concurrency}
+        report["idle"] = await protected_routes(port, token, args)
+
+        stop = asyncio.Event()
+        login_task = asyncio.create_task(logins(port, args, stop))
+        report["under_login_load"] = await protected_routes(port, token, args)
+        stop.set()
+        report["logins"] = await login_task
+    finally:
+        process.terminate()
+        process.wait()
+
+    for path in ("/getuser", "/students"):
+        idle, busy = report["idle"][path], report["under_login_load"][path]
+        print(f"{path}: p99 {idle['p99_ms']}ms idle, {busy['p99_ms']}ms during logins")
+    print(f"logins: {report['logins']['rps']} per second")
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Protected-route latency while logins are hashing passwords")
+    parser.add_argument("--iterations", type=int, default=600000, help="PBKDF2 rounds")
+    parser.add_argument("--password-workers", type=int, default=2)
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("-n", "--requests", type=int, default=5000)
+    parser.add_argument("--login-concurrency", type=int, default=16)
+    parser.add_argument("-o", "--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,52 @@
+import gzip
+import json
+import os
+import threading
+import time
+from shared.responses import dumps
+
+# how often the file's mtime is checked; in between requests are served from memory
+REFRESH_INTERVAL = 1.0
+GZIP_LEVEL = 6
+
+
+def accepts_gzip(accept_encoding):
+    if not accept_encoding:
+        return False
+    # an explicit gzip entry wins over *, and q=0 means "not acceptable"
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        accepted[name.strip().lower()] = params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return accepted.get("gzip", accepted.get("*", False))
+
+
+class EncodedJSONFile:
+    # a JSON file kept as ready-to-send bytes, plain and gzipped, rebuilt
+    # only when the file's mtime or size changes
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self._stat = None
+        self._variants = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _file_stat(self):
+        st = os.stat(self.file_name)
+        return (st.st_mtime_ns, st.st_size)
+
+    def refresh(self):
+        with self._lock:
+            stat = self._file_stat()
+            if stat != self._stat:
+                with open(self.file_name, 'rb') as f:
+                    body = dumps(json.loads(f.read()))
+                self._variants = {"identity": body, "gzip": gzip.compress(body, GZIP_LEVEL)}
+                self._stat = stat
+            self._checked_at = time.monotonic()
+
+    def needs_check(self):
+        return time.monotonic() - self._checked_at >= REFRESH_INTERVAL
+
+    def body(self, encoding="identity"):
+        return self._variants[encoding]
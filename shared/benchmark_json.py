@@ -0,0 +1,50 @@
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.responses import dumps, orjson, stdlib_dumps
+
+# times what FastJSONResponse.render calls against plain JSONResponse encoding
+# on student lists of growing size
+SIZES = [100, 10_000, 100_000, 1_000_000]
+ROUNDS = 5
+
+random.seed(42)
+
+
+def make_students(count):
+    return [
+        {
+            "student_id": i,
+            "student_name": f"Student{i}",
+            "student_age": random.randint(17, 25),
+            "student_marks": random.randint(0, 100),
+        }
+        for i in range(count)
+    ]
+
+
+encoders = {"json": stdlib_dumps}
+if orjson is not None:
+    encoders["orjson"] = dumps
+else:
+    print("orjson is not installed, only the stdlib encoder is measured")
+
+
+def best_time(encode, content):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        encode(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+for size in SIZES:
+    students = make_students(size)
+    results = {name: best_time(encode, students) for name, encode in encoders.items()}
+    line = ", ".join(f"{name} {seconds * 1000:.2f}ms" for name, seconds in results.items())
+    if "orjson" in results:
+        line += f", speedup {results['json'] / results['orjson']:.1f}x"
+    print(f"{size} students: {line}")
@@ -0,0 +1,39 @@
+import hashlib
+import json
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class EncodedCache:
+    # (etag, body) for one JSON document, encoded the same way JSONResponse
+    # does and tagged with a hash of the bytes. the owner passes its version,
+    # which goes up on every change, and the body is rebuilt only after one
+    __slots__ = ("_cached",)
+
+    def __init__(self):
+        self._cached = None
+
+    def peek(self, version):
+        # the cached (etag, body), or None when version has moved on
+        cached = self._cached
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        return None
+
+    def get(self, version, content):
+        # content is only called when the body has to be encoded again;
+        # version is read by the caller first, so a change made meanwhile
+        # leaves a stale version behind and is picked up on the next call
+        found = self.peek(version)
+        if found is None:
+            body = json.dumps(content(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            self._cached = (version, etag, body)
+            found = (etag, body)
+        return found
@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+# tiny keep-alive HTTP/1.1 load generator, so no extra packages are needed.
+# example:
+#   python shared/load_test.py http://127.0.0.1:8000/students/1 -c 256 -n 20000 -H x-api-key:mysecretkey
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    status = int(status_line.split()[1])
+    length = None
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value.lower():
+            chunked = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status
+
+
+def build_request(method, host, path, headers, body):
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    if body is not None:
+        lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b"")
+
+
+async def client(host, port, next_request, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            request = next_request()
+            if request is None:
+                break
+            start = time.perf_counter()
+            writer.write(request)
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(url, method="GET", headers=None, body=None, concurrency=64, total=10000, make_body=None):
+    # make_body(i) lets callers send a different body per request, e.g. new ids on POST
+    parts = urlsplit(url)
+    path = parts.path + ("?" + parts.query if parts.query else "")
+    headers = dict(headers or {})
+    if body is not None or make_body is not None:
+        headers.setdefault("Content-Type", "application/json")
+    sent = 0
+
+    def next_request():
+        nonlocal sent
+        if sent >= total:
+            return None
+        sent += 1
+        payload = make_body(sent) if make_body is not None else body
+        return build_request(method, parts.netloc, path, headers, payload)
+
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(parts.hostname, parts.port or 80, next_request, latencies, statuses)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, statuses, elapsed)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, statuses, elapsed):
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive one endpoint and report RPS and latency")
+    parser.add_argument("url")
+    parser.add_argument("-X", "--method", default="GET")
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("-n", "--requests", type=int, default=10000)
+    parser.add_argument("-H", "--header", action="append", default=[], help="name:value")
+    parser.add_argument("-d", "--data", help="request body")
+    args = parser.parse_args()
+
+    headers = dict(h.split(":", 1) for h in args.header)
+    body = args.data.encode() if args.data else None
+    result = asyncio.run(run_load(args.url, args.method, headers, body, args.concurrency, args.requests))
+    print(result)
@@ -0,0 +1,154 @@
+import bisect
+import contextvars
+from time import perf_counter
+
+# fixed log-scale buckets from 100us to about 13s
+BUCKETS = [0.0001 * 2 ** i for i in range(18)]
+
+_phases = contextvars.ContextVar("metrics_phases", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+class MetricsRegistry:
+    # observations happen in the middleware on the event loop, so plain dicts are enough
+    def __init__(self):
+        self.requests = {}
+        self.phases = {}
+        self.statuses = {}
+
+    def observe(self, route, method, status, seconds, phases):
+        key = (route, method)
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = Histogram()
+        histogram.observe(seconds)
+        status_key = (route, method, status)
+        self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+        for phase, phase_seconds in phases.items():
+            phase_key = (route, method, phase)
+            histogram = self.phases.get(phase_key)
+            if histogram is None:
+                histogram = self.phases[phase_key] = Histogram()
+            histogram.observe(phase_seconds)
+
+    def render(self):
+        lines = []
+        _render_histograms(lines, "http_request_duration_seconds", "Request latency by route",
+                           self.requests, ("route", "method"))
+        _render_histograms(lines, "http_request_phase_duration_seconds",
+                           "Time spent in each phase of a request", self.phases, ("route", "method", "phase"))
+        lines.append("# HELP http_requests_total Requests by route and status")
+        lines.append("# TYPE http_requests_total counter")
+        for (route, method, status), count in sorted(self.statuses.items()):
+            lines.append(f'http_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _render_histograms(lines, name, help_text, histograms, label_names):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        labels = ",".join(f'{label}="{value}"' for label, value in zip(label_names, key))
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ["+Inf"], histogram.counts):
+            cumulative += count
+            le = bound if bound == "+Inf" else f"{bound:g}"
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+REGISTRY = MetricsRegistry()
+
+
+class timed:
+    # `with timed("storage"):` adds the block's time to the current request's
+    # phase totals. a plain class because @contextmanager costs several times more.
+    __slots__ = ("phase", "start")
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        phases = _phases.get()
+        if phases is not None:
+            phases[self.phase] = phases.get(self.phase, 0.0) + perf_counter() - self.start
+
+
+_route_paths = {}
+
+
+def route_template(scope):
+    # label by the route pattern, not the raw path, so ids don't explode the series count
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    path = _route_paths.get(endpoint)
+    if path is None:
+        path = "unmatched"
+        for candidate in scope["app"].router.routes:
+            if getattr(candidate, "endpoint", None) is endpoint:
+                path = candidate.path
+                break
+        _route_paths[endpoint] = path
+    return path
+
+
+class MetricsMiddleware:
+    # plain ASGI middleware, cheaper than BaseHTTPMiddleware
+    def __init__(self, app, registry=REGISTRY):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases = {}
+        token = _phases.set(phases)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            _phases.reset(token)
+            self.registry.observe(route_template(scope), scope["method"], status, elapsed, phases)
+
+
+def install_metrics(app, registry=REGISTRY):
+    from fastapi.responses import PlainTextResponse
+
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
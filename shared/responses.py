@@ -0,0 +1,38 @@
+import json
+from fastapi.responses import JSONResponse
+from .metrics import timed
+
+# orjson is used when it is installed, otherwise the standard json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def stdlib_dumps(content):
+    # exactly what JSONResponse.render produces
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(content):
+    # with orjson, NaN and Infinity are written as null where JSONResponse
+    # raises ValueError. looking for them would mean a second walk over the
+    # content, and the API models only carry ints and strings, so null it is
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson refuses ints wider than 64 bits, which json encodes
+            pass
+    return stdlib_dumps(content)
+
+
+class FastJSONResponse(JSONResponse):
+    # drop-in for JSONResponse(content=..., status_code=..., headers=...);
+    # bytes are treated as an already encoded body and sent untouched
+    def render(self, content):
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        with timed("serialize"):
+            return dumps(content)